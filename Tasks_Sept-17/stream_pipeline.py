@@ -0,0 +1,187 @@
+import csv
+import json
+import math
+
+
+class RunningStats:
+    """Track count, sum, mean, min, max and variance of a stream in one pass."""
+
+    __slots__ = ('count', 'total', 'mean', 'minimum', 'maximum', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._m2 = 0.0
+
+    def add(self, value):
+        """Add a value using Welford's update."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        """Combine the stats of another stream into this one."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.total, self.mean = other.count, other.total, other.mean
+            self.minimum, self.maximum, self._m2 = other.minimum, other.maximum, other._m2
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self):
+        """Return the population variance."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """Return the population standard deviation."""
+        return math.sqrt(self.variance)
+
+
+class GroupedStats:
+    """Keep running stats overall and per group key."""
+
+    def __init__(self):
+        self.overall = RunningStats()
+        self.groups = {}
+
+    def add(self, value, key=None):
+        """Add a value to the overall stats and to its group."""
+        self.overall.add(value)
+        if key is not None:
+            stats = self.groups.get(key)
+            if stats is None:
+                stats = self.groups[key] = RunningStats()
+            stats.add(value)
+
+    def sorted_groups(self):
+        """Return (key, stats) pairs sorted by key."""
+        return sorted(self.groups.items(), key=lambda item: str(item[0]))
+
+
+# Sources
+
+def read_csv(path, encoding='utf-8'):
+    """Yield rows of a CSV file as dicts, one at a time."""
+    with open(path, 'r', newline='', encoding=encoding) as file:
+        yield from csv.DictReader(file)
+
+
+def read_json_array(path, chunk_size=1 << 16, encoding='utf-8'):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding=encoding) as file:
+        buffer = ''
+        position = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace and separators between items
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise ValueError(f"{path} does not contain a JSON array")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            if position < len(buffer):
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A number is only complete once a separator follows it, since "1." or "1e"
+                    # at the end of a chunk parses as 1 with the rest still to be read
+                    if eof or (end < len(buffer) and buffer[end] in ' \t\r\n,]'):
+                        position = end
+                        yield item
+                        continue
+            if eof:
+                if started:
+                    raise ValueError(f"{path} ends before the JSON array is closed")
+                return
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def read_json_lines(path, encoding='utf-8'):
+    """Yield one JSON object per non-empty line."""
+    with open(path, 'r', encoding=encoding) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_records(path, encoding='utf-8'):
+    """Pick a streaming source from the file extension."""
+    if path.endswith('.csv'):
+        return read_csv(path, encoding)
+    if path.endswith('.jsonl'):
+        return read_json_lines(path, encoding)
+    return read_json_array(path, encoding=encoding)
+
+
+# Stages
+
+def parse(records, convert):
+    """Apply convert to each record, skipping and reporting bad ones."""
+    for number, record in enumerate(records, 1):
+        try:
+            yield convert(record)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            print(f"Skipping record {number}: {e}")
+
+
+def aggregate(records, stats, value, key=None):
+    """Feed each record into stats and pass it on unchanged."""
+    for record in records:
+        stats.add(value(record), key(record) if key else None)
+        yield record
+
+
+def sink(records, write=None):
+    """Drain the pipeline, handing each record to write, and return the count."""
+    count = 0
+    for record in records:
+        if write is not None:
+            write(record)
+        count += 1
+    return count
+
+
+def format_number(value):
+    """Show floats with two decimals and leave whole numbers as they are."""
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def format_stats(stats, prefix=''):
+    """Format running stats as a single summary line."""
+    if not stats.count:
+        return f"{prefix}Count: 0"
+    return (f"{prefix}Count: {stats.count}, Total: {format_number(stats.total)}, Mean: {stats.mean:.2f}, "
+            f"Min: {format_number(stats.minimum)}, Max: {format_number(stats.maximum)}, Std Dev: {stats.std:.2f}")
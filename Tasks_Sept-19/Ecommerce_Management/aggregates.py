@@ -0,0 +1,87 @@
+import heapq
+
+class TopK:
+    def __init__(self):
+        self.values = {}  # key -> current value
+        self.sequence = {}  # key -> insertion number, so ties go to the earliest key
+        self.heap = []  # (-value, sequence, key), may hold outdated entries
+        self.changed = set()  # keys whose new value is not in the heap yet
+
+    def add(self, key, amount):
+        """Increase the value for a key"""
+        value = self.values.get(key)
+        if value is None:
+            self.sequence[key] = len(self.sequence)
+            value = 0
+        self.values[key] = value + amount
+        self.changed.add(key)
+
+    def refresh(self):
+        """Push changed values onto the heap, rebuilding it once outdated entries outnumber live ones"""
+        if len(self.heap) + len(self.changed) > 2 * len(self.values) + 64:
+            self.heap = [(-value, self.sequence[key], key) for key, value in self.values.items()]
+            heapq.heapify(self.heap)
+        else:
+            for key in self.changed:
+                heapq.heappush(self.heap, (-self.values[key], self.sequence[key], key))
+        self.changed.clear()
+
+    def get(self, key, default=0):
+        """Return the current value for a key"""
+        return self.values.get(key, default)
+
+    def top(self, k=1):
+        """Return the k keys with the highest values as (key, value) pairs"""
+        self.refresh()
+        result = []
+        seen = set()
+        while self.heap and len(result) < k:
+            entry = heapq.heappop(self.heap)
+            value, _, key = entry
+            if key in seen or self.values[key] != -value:
+                continue  # outdated entry
+            seen.add(key)
+            result.append(entry)
+        for entry in result:
+            heapq.heappush(self.heap, entry)
+        return [(key, -value) for value, _, key in result]
+
+    def items(self):
+        return self.values.items()
+
+    def __len__(self):
+        return len(self.values)
+
+class SalesAggregates:
+    def __init__(self):
+        self.total_revenue = 0
+        self.revenue_by_category = {}
+        self.quantity_by_product = TopK()
+        self.spend_by_customer = TopK()
+
+    def add_order(self, order):
+        """Fold an order into the running totals"""
+        for product, quantity in order.items:
+            revenue = product.price * quantity
+            self.revenue_by_category[product.category] = self.revenue_by_category.get(product.category, 0) + revenue
+            self.quantity_by_product.add(product.id, quantity)
+        self.total_revenue += order.get_total()
+        self.spend_by_customer.add(order.customer.name, order.get_total())
+
+    def load_totals(self, totals):
+        """Replace the running totals with totals recomputed from the full order history"""
+        self.__init__()
+        self.total_revenue = totals['revenue']
+        self.revenue_by_category = dict(totals['category_revenue'])
+        for product_id, quantity in totals['product_quantities'].items():
+            self.quantity_by_product.add(product_id, quantity)
+        for customer_name, spend in totals['customer_spend'].items():
+            self.spend_by_customer.add(customer_name, spend)
+
+    def top_products(self, k=1):
+        """Return the k most ordered product ids with their total quantities"""
+        return self.quantity_by_product.top(k)
+
+    def top_customers(self, k=1):
+        """Return the k highest spending customer names with their total spend"""
+        return self.spend_by_customer.top(k)
@@ -0,0 +1,94 @@
+import asyncio
+import csv
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from product import Product
+from order import parse_time
+import common_path
+from common.streaming import iter_records
+from common.metrics import metrics
+
+def parse_products(path='products.csv'):
+    """Read and parse products.csv into columns, in a worker process"""
+    columns = {'id': array('q'), 'name': [], 'category': [], 'price': array('d'), 'stock': array('q')}
+    with open(path, 'r') as file:
+        for row in csv.DictReader(file):
+            columns['id'].append(int(row['id']))
+            columns['name'].append(row['name'])
+            columns['category'].append(row['category'])
+            columns['price'].append(float(row['price']))
+            columns['stock'].append(int(row['stock']))
+    columns['bytes'] = os.path.getsize(path)
+    return columns
+
+def parse_orders(path='orders.json'):
+    """Read and parse orders.json into columns, in a worker process.
+    
+    Arrays pickle as raw bytes, so returning columns instead of dicts keeps the
+    transfer back to the main process cheap.
+    """
+    columns = {'order_id': array('q'), 'customer': [], 'created_at': [], 'item_start': array('Q', [0]),
+               'product_id': array('q'), 'qty': array('q')}
+    for record in iter_records(path):
+        columns['order_id'].append(record['order_id'])
+        columns['customer'].append(record['customer'])
+        columns['created_at'].append(record.get('created_at'))
+        for item in record['items']:
+            columns['product_id'].append(item['product_id'])
+            columns['qty'].append(item['qty'])
+        columns['item_start'].append(len(columns['product_id']))
+    columns['bytes'] = os.path.getsize(path)
+    return columns
+
+def iter_product_rows(columns):
+    """Yield (id, name, category, price, stock) rows from product columns"""
+    return zip(columns['id'].tolist(), columns['name'], columns['category'],
+               columns['price'].tolist(), columns['stock'].tolist())
+
+def iter_order_rows(columns):
+    """Yield (order_id, customer, items, created_at) rows from order columns, with items as (product_id, qty) pairs"""
+    item_start = columns['item_start'].tolist()
+    product_ids = columns['product_id'].tolist()
+    quantities = columns['qty'].tolist()
+    rows = zip(columns['order_id'].tolist(), columns['customer'], columns['created_at'])
+    for row, (order_id, customer_name, created_at) in enumerate(rows):
+        start, end = item_start[row], item_start[row + 1]
+        yield order_id, customer_name, zip(product_ids[start:end], quantities[start:end]), parse_time(created_at)
+
+async def load_concurrently(system, products_path='products.csv', orders_path='orders.json'):
+    """Load products and orders into an ECommerceSystem with both files read and parsed at once.
+    
+    The catalogue is built as soon as the products arrive, while the orders are
+    still being parsed. Orders refer to products by id only, so their products
+    are resolved afterwards in a second pass over the finished catalogue.
+    """
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        products = loop.run_in_executor(executor, parse_products, products_path)
+        orders = loop.run_in_executor(executor, parse_orders, orders_path)
+        
+        try:
+            columns = await products
+            for row in iter_product_rows(columns):
+                system.catalog.add(Product(*row))
+            metrics.add(rows=len(columns['id']), bytes_read=columns['bytes'])
+            system.apply_journal_stock()
+            print("Products loaded successfully!")
+        except FileNotFoundError:
+            print("Products file not found.")
+        except Exception as e:
+            print(f"Error loading products: {e}")
+        
+        # Deferred pass: resolve order items against the finished catalogue
+        try:
+            columns = await orders
+            for order_id, customer_name, items, created_at in iter_order_rows(columns):
+                system.add_order(order_id, customer_name, items, created_at)
+            metrics.add(rows=len(columns['order_id']), bytes_read=columns['bytes'])
+            print("Orders loaded successfully!")
+        except FileNotFoundError:
+            print("Orders file not found.")
+        except Exception as e:
+            print(f"Error loading orders: {e}")
+    system.replay_journal_orders()
@@ -0,0 +1,263 @@
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import threading
+import time
+from main import ECommerceSystem, LineItemTable
+from product import Product
+from customer import Customer
+from order import Order
+from snapshot import Snapshot
+from order_engine import OrderEngine
+from datagen import write_dataset
+import common_path
+from common.bench import working_directory, measure_bytes, time_call, print_results, save_results, compare_results
+
+# Product, Customer and Order as they were before __slots__, for the memory suite
+class LegacyProduct:
+    def __init__(self, id, name, category, price, stock):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.price = price
+        self.stock = stock
+
+class LegacyCustomer:
+    def __init__(self, name):
+        self.name = name
+        self.orders = []
+
+class LegacyOrder:
+    def __init__(self, order_id, customer):
+        self.order_id = order_id
+        self.customer = customer
+        self.items = []
+    
+    def add_item(self, product, quantity):
+        self.items.append({'product': product, 'quantity': quantity})
+
+def time_load(directory):
+    """Time load_products and load_orders on the dataset in a directory"""
+    with working_directory(directory), contextlib.redirect_stdout(io.StringIO()):
+        system = ECommerceSystem()
+        start = time.perf_counter()
+        system.load_products()
+        products_time = time.perf_counter() - start
+        start = time.perf_counter()
+        system.load_orders()
+        orders_time = time.perf_counter() - start
+    return products_time, orders_time
+
+def bench_load_scaling(num_products=200000, order_counts=(10000, 20000, 40000, 80000)):
+    """Show that load time grows linearly with the number of orders"""
+    print(f"\n=== LOAD SCALING ({num_products} products) ===")
+    for num_orders in order_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            write_dataset(directory, num_products, num_orders)
+            products_time, orders_time = time_load(directory)
+        print(f"Orders: {num_orders:>8}  load_products: {products_time:.3f}s  "
+              f"load_orders: {orders_time:.3f}s  ({orders_time / num_orders * 1e6:.2f} µs/order)")
+
+def bench_startup(num_products=200000, num_orders=200000, lookups=100):
+    """Compare cold start from CSV/JSON with the binary snapshot"""
+    print(f"\n=== STARTUP ({num_products} products, {num_orders} orders) ===")
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, num_products, num_orders)
+        with working_directory(directory):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                system = ECommerceSystem()
+                system.load_products()
+                system.load_orders()
+                csv_time = time.perf_counter() - start
+                system.save_snapshot()
+                
+                start = time.perf_counter()
+                ECommerceSystem().load_snapshot()
+                snapshot_time = time.perf_counter() - start
+            
+            # Lazy path: resolve random product ids and order rows straight from the mapped file
+            start = time.perf_counter()
+            with Snapshot('store.snapshot') as snapshot:
+                for _ in range(lookups):
+                    snapshot.find_product(random.randint(1, num_products))
+                    snapshot.order(random.randrange(snapshot.order_count()))
+            lazy_time = time.perf_counter() - start
+    print(f"CSV/JSON full load: {csv_time:.3f}s")
+    print(f"Snapshot full load: {snapshot_time:.3f}s")
+    print(f"Snapshot open + {lookups} product and order lookups: {lazy_time:.4f}s")
+
+def bench_concurrency(thread_counts=(1, 4, 16), orders_per_thread=2000, num_products=20):
+    """Measure order throughput with many threads competing for a few products"""
+    print(f"\n=== CONCURRENT ORDERS ({num_products} hot products) ===")
+    for num_threads in thread_counts:
+        with tempfile.TemporaryDirectory() as directory, working_directory(directory):
+            # Keep background file writes out of the measurement
+            system = ECommerceSystem(flush_interval=None, compact_every=float('inf'))
+            # Orders take 3 items of 1-3 units each, so 6 units on average. Stock for 20% more
+            # than the expected demand lets nearly every order through while the products stay hot.
+            expected_units = num_threads * orders_per_thread * 6 // num_products
+            initial_stock = expected_units * 6 // 5
+            for product_id in range(1, num_products + 1):
+                system.catalog.add(Product(product_id, f"Product {product_id}", "Hot", 100.0, initial_stock))
+            engine = OrderEngine(system)
+            
+            def worker(seed):
+                rng = random.Random(seed)
+                for _ in range(orders_per_thread):
+                    items = [(rng.randint(1, num_products), rng.randint(1, 3)) for _ in range(3)]
+                    engine.place_order(f"Customer {seed}", items)
+            
+            threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(num_threads)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            system.close()
+        
+        # Stock must be conserved: nothing oversold, nothing lost
+        sold = sum(quantity for order in system.orders for _, quantity in order.items)
+        remaining = sum(product.stock for product in system.products)
+        assert sold + remaining == initial_stock * num_products
+        assert all(product.stock >= 0 for product in system.products)
+        total = engine.placed + engine.rejected
+        print(f"Threads: {num_threads:>3}  {engine.placed / elapsed:,.0f} placed/sec  "
+              f"{total / elapsed:,.0f} attempted/sec  (placed {engine.placed}, rejected {engine.rejected})")
+
+def bench_memory(count=100000):
+    """Compare bytes per Product, Customer and Order with the legacy dict-based versions"""
+    print(f"\n=== MEMORY PER OBJECT ({count} objects) ===")
+    product = Product(1, "Laptop", "Electronics", 55000.0, 10)
+
+    def make_order(order_class, customer_class):
+        def factory(index):
+            order = order_class(index, customer_class(f"Customer {index}"))
+            for quantity in range(1, 4):
+                order.add_item(product, quantity)
+            return order
+        return factory
+
+    cases = [
+        ('Product', lambda i: LegacyProduct(i, f"Product {i}", "Electronics", float(i), i),
+                    lambda i: Product(i, f"Product {i}", "Electronics", float(i), i)),
+        ('Customer', lambda i: LegacyCustomer(f"Customer {i}"), lambda i: Customer(f"Customer {i}")),
+        ('Order (3 items, with customer)', make_order(LegacyOrder, LegacyCustomer), make_order(Order, Customer)),
+    ]
+    for name, legacy_factory, factory in cases:
+        legacy_bytes = measure_bytes(legacy_factory, count)
+        new_bytes = measure_bytes(factory, count)
+        print(f"{name}: {legacy_bytes:.0f} -> {new_bytes:.0f} bytes ({new_bytes / legacy_bytes:.0%})")
+
+def bench_columnar(num_items=5000000, num_products=200000, num_customers=100000, items_per_order=3):
+    """Time vectorized group-bys over a synthetic line item table"""
+    if LineItemTable is None:
+        print("\nNumPy is not installed. Skipping columnar benchmark.")
+        return
+    import numpy as np
+    print(f"\n=== COLUMNAR ANALYTICS ({num_items} line items) ===")
+    rng = np.random.default_rng(42)
+    num_orders = num_items // items_per_order
+    table = LineItemTable()
+    table.product_ids.extend(np.arange(1, num_products + 1))
+    table.prices.extend(rng.integers(100, 50000, num_products))
+    table.categories = [f"Category {code}" for code in range(20)]
+    table.category_codes.extend(rng.integers(0, 20, num_products))
+    table.customers = [f"Customer {code}" for code in range(num_customers)]
+    table.order_ids.extend(np.arange(101, 101 + num_orders))
+    table.order_customers.extend(rng.integers(0, num_customers, num_orders))
+    table.item_orders.extend(np.repeat(np.arange(num_orders), items_per_order))
+    table.item_products.extend(rng.integers(0, num_products, num_orders * items_per_order))
+    table.item_quantities.extend(rng.integers(1, 6, num_orders * items_per_order))
+    for name in ('revenue_by_category', 'spend_by_customer', 'most_ordered_product', 'order_totals', 'sales_totals'):
+        start = time.perf_counter()
+        getattr(table, name)()
+        print(f"{name}: {time.perf_counter() - start:.3f}s")
+
+def products_only():
+    system = ECommerceSystem()
+    system.load_products()
+    return system
+
+def bench_methods(num_products=100000, num_orders=100000, num_customers=None, exponent=1.1,
+                  repeat=3, seed=42):
+    """Time every loader, saver and report method of ECommerceSystem on a synthetic dataset"""
+    print(f"\n=== METHODS ({num_products} products, {num_orders} orders, "
+          f"Zipf {exponent}, best of {repeat}) ===")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, num_products, num_orders, num_customers, exponent, seed)
+        with working_directory(directory):
+            # Loaders start from an empty system on every run, orders need the products first
+            results['load_products'] = time_call(lambda: ECommerceSystem().load_products(), repeat)
+            results['load_orders'] = time_call(lambda system: system.load_orders(), repeat, products_only)
+            results['load_all'] = time_call(lambda: ECommerceSystem().load_all(), repeat)
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                system = products_only()
+                system.load_orders()
+            cases = [
+                ('save_products', system.save_products),
+                ('save_orders', system.save_orders),
+                ('compact', system.compact),
+                ('save_snapshot', system.save_snapshot),
+                ('load_snapshot', lambda: ECommerceSystem().load_snapshot()),
+                ('print_all_products', system.print_all_products),
+                ('view_all_orders', system.view_all_orders),
+                ('print_order_totals', system.print_order_totals),
+                ('find_most_expensive_product', system.find_most_expensive_product),
+                ('find_most_expensive_products', lambda: system.find_most_expensive_products(10)),
+                ('print_all_products(price band)', lambda: system.print_all_products(page=1, min_price=100, max_price=200)),
+                ('find_most_ordered_product', system.find_most_ordered_product),
+                ('search_products', lambda: system.search_products("item 12")),
+                ('search_customers', lambda: system.search_customers("customer 42")),
+                ('iter_customer_leaderboard', lambda: sum(1 for _ in system.iter_customer_leaderboard())),
+                ('generate_sales_report', system.generate_sales_report),
+                ('generate_sales_report(recompute)', lambda: system.generate_sales_report(recompute=True)),
+                ('generate_inventory_report', system.generate_inventory_report),
+                ('generate_inventory_report(recompute)', lambda: system.generate_inventory_report(recompute=True)),
+            ]
+            for name, function in cases:
+                results[name] = time_call(function, repeat)
+            system.close()
+    
+    print_results(results)
+    scale = {'products': num_products, 'orders': num_orders, 'customers': num_customers,
+             'exponent': exponent, 'seed': seed}
+    return scale, results
+
+# Run the benchmarks
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ECommerceSystem on synthetic data")
+    parser.add_argument('--suite', choices=['methods', 'scaling', 'startup', 'concurrency', 'memory',
+                                            'columnar', 'all'], default='all')
+    parser.add_argument('--products', type=int, default=100000, help="products for the methods suite")
+    parser.add_argument('--orders', type=int, default=100000, help="orders for the methods suite")
+    parser.add_argument('--customers', type=int, help="distinct customers, default one per ten orders")
+    parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent of product and customer popularity")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per method, the fastest is kept")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json', help="file to record method timings in")
+    parser.add_argument('--baseline', help="earlier results file to compare method timings with")
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    if args.suite in ('methods', 'all'):
+        scale, results = bench_methods(args.products, args.orders, args.customers, args.skew,
+                                       args.repeat, args.seed)
+        save_results(args.output, scale, results)
+        if args.baseline:
+            compare_results(args.baseline, scale, results)
+    if args.suite in ('scaling', 'all'):
+        bench_load_scaling()
+    if args.suite in ('startup', 'all'):
+        bench_startup()
+    if args.suite in ('concurrency', 'all'):
+        bench_concurrency()
+    if args.suite in ('memory', 'all'):
+        bench_memory()
+    if args.suite in ('columnar', 'all'):
+        bench_columnar()
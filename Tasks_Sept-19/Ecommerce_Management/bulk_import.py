@@ -0,0 +1,39 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from main import ECommerceSystem
+import common_path
+from common.streaming import iter_records, iter_file_records
+
+def main():
+    parser = argparse.ArgumentParser(description="Import orders without the interactive menu")
+    parser.add_argument('file', help="JSON array or JSON Lines file of orders, or - for stdin")
+    parser.add_argument('--batch-size', type=int, default=1000, help="records validated per batch")
+    parser.add_argument('--quiet', action='store_true', help="hide load and save messages")
+    args = parser.parse_args()
+
+    system = ECommerceSystem()
+    output = io.StringIO() if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        system.load_products()
+        system.load_orders()
+
+    records = iter_file_records(sys.stdin) if args.file == '-' else iter_records(args.file)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        placed, errors = system.import_orders(records, args.batch_size)
+        system.close()
+    elapsed = time.perf_counter() - start
+
+    for number, error in errors[:20]:
+        print(f"Record {number}: {error}")
+    if len(errors) > 20:
+        print(f"... and {len(errors) - 20} more errors")
+    total = placed + len(errors)
+    print(f"\nImported {placed} of {total} orders in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} records/sec)")
+
+if __name__ == "__main__":
+    main()
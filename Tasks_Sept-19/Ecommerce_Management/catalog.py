@@ -0,0 +1,204 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+import common_path
+from common.search_index import SearchIndex
+
+class Catalog:
+    def __init__(self, low_stock_threshold=5):
+        self.products = []
+        self.by_id = {}  # product id -> Product
+        self.by_category = {}  # category -> list of Products
+        self.category_prices = {}  # category -> sum of product prices
+        self.low_stock_threshold = low_stock_threshold
+        self.locks = {}  # product id -> lock guarding that product's stock
+        
+        # Sorted (price, id) and (stock, id) lists per category, with None for the whole catalogue.
+        # A missing entry means the index is built from scratch on its next query.
+        self.price_index = {}
+        self.stock_index = {}
+        self.indexed_stock = {}  # product id -> stock value held in the stock indexes
+        self.index_lock = threading.RLock()
+        self.search = SearchIndex()  # name and category tokens -> product ids
+
+    def add(self, product):
+        """Add a product to the catalogue and all of its indexes"""
+        if product.id in self.by_id:
+            self.remove(product.id)
+        self.products.append(product)
+        self.by_id[product.id] = product
+        self.locks[product.id] = threading.Lock()
+        self.by_category.setdefault(product.category, []).append(product)
+        self.category_prices[product.category] = self.category_prices.get(product.category, 0) + product.price
+        self.search.add(product.id, product.name, product.category)
+        with self.index_lock:
+            self.indexed_stock[product.id] = product.stock
+            for key in (None, product.category):
+                if key in self.price_index:
+                    insort(self.price_index[key], (product.price, product.id))
+                if key in self.stock_index:
+                    insort(self.stock_index[key], (product.stock, product.id))
+
+    def remove(self, product_id):
+        """Remove a product from the catalogue and all of its indexes"""
+        product = self.by_id.pop(product_id, None)
+        if not product:
+            return None
+        self.products.remove(product)
+        self.by_category[product.category].remove(product)
+        self.category_prices[product.category] -= product.price
+        if not self.by_category[product.category]:
+            del self.by_category[product.category]
+            del self.category_prices[product.category]
+        self.search.remove(product_id)
+        with self.index_lock:
+            stock = self.indexed_stock.pop(product_id)
+            for key in (None, product.category):
+                if key in self.price_index:
+                    discard(self.price_index[key], (product.price, product_id))
+                if key in self.stock_index:
+                    discard(self.stock_index[key], (stock, product_id))
+            if product.category not in self.by_category:
+                self.price_index.pop(product.category, None)
+                self.stock_index.pop(product.category, None)
+        self.locks.pop(product_id, None)
+        return product
+
+    def get(self, product_id):
+        """Return the product with the given id, or None"""
+        return self.by_id.get(product_id)
+
+    def in_category(self, category):
+        """Return all products in a category"""
+        return self.by_category.get(category, [])
+
+    def get_average_prices(self):
+        """Return the average product price for each category"""
+        return {category: total_price / len(self.by_category[category])
+                for category, total_price in self.category_prices.items()}
+
+    def search_products(self, query, limit=20):
+        """Return up to limit products whose name or category matches the query, best match first"""
+        return [self.by_id[product_id] for product_id in self.search.search(query, limit)]
+    
+    def get_price_index(self, category=None):
+        """Return the sorted (price, id) list for a category, or for the whole catalogue.
+        
+        An unknown category gets an empty list that is not cached, so queries for
+        arbitrary categories cannot grow the indexes.
+        """
+        with self.index_lock:
+            index = self.price_index.get(category)
+            if index is None:
+                if category is not None and category not in self.by_category:
+                    return []
+                products = self.products if category is None else self.in_category(category)
+                index = self.price_index[category] = sorted((p.price, p.id) for p in products)
+            return index
+    
+    def get_stock_index(self, category=None):
+        """Return the sorted (stock, id) list for a category, or for the whole catalogue, empty and uncached for an unknown one"""
+        with self.index_lock:
+            index = self.stock_index.get(category)
+            if index is None:
+                if category is not None and category not in self.by_category:
+                    return []
+                products = self.products if category is None else self.in_category(category)
+                index = self.stock_index[category] = sorted((self.indexed_stock[p.id], p.id) for p in products)
+            return index
+    
+    def in_price_range(self, low=None, high=None, category=None, offset=0, limit=None):
+        """Return products priced between low and high inclusive, cheapest first,
+        optionally only limit of them after skipping offset
+        """
+        with self.index_lock:
+            index = self.get_price_index(category)
+            start, end = price_bounds(index, low, high)
+            start = min(start + offset, end)
+            if limit is not None:
+                end = min(end, start + limit)
+            return [self.by_id[product_id] for _, product_id in index[start:end]]
+    
+    def count_in_price_range(self, low=None, high=None, category=None):
+        """Return how many products are priced between low and high inclusive"""
+        with self.index_lock:
+            start, end = price_bounds(self.get_price_index(category), low, high)
+            return end - start
+    
+    def most_expensive(self, n=1, category=None):
+        """Return the n most expensive products, most expensive first"""
+        with self.index_lock:
+            index = self.get_price_index(category)
+            return [self.by_id[product_id] for _, product_id in reversed(index[max(len(index) - n, 0):])]
+    
+    def get_low_stock(self, threshold=None, category=None):
+        """Return products with stock below the threshold, lowest stock first"""
+        if threshold is None:
+            threshold = self.low_stock_threshold
+        with self.index_lock:
+            index = self.get_stock_index(category)
+            return [self.by_id[product_id] for _, product_id in index[:bisect_left(index, (threshold,))]]
+
+    def reserve(self, items):
+        """Take stock for every (product, quantity) item, or for none of them if any is short"""
+        needed = {}
+        for product, quantity in items:
+            needed[product.id] = needed.get(product.id, 0) + quantity
+        
+        # Lock in id order so two orders sharing products can never deadlock
+        locks = [self.locks[product_id] for product_id in sorted(needed)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for product_id, quantity in needed.items():
+                if self.by_id[product_id].stock < quantity:
+                    return False
+            for product_id, quantity in needed.items():
+                product = self.by_id[product_id]
+                product.stock -= quantity
+                self.reindex_stock(product)
+            return True
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def release(self, items):
+        """Return stock taken by reserve for every (product, quantity) item"""
+        needed = {}
+        for product, quantity in items:
+            needed[product.id] = needed.get(product.id, 0) + quantity
+        for product_id in sorted(needed):
+            with self.locks[product_id]:
+                product = self.by_id[product_id]
+                product.stock += needed[product_id]
+                self.reindex_stock(product)
+
+    def reindex_stock(self, product):
+        """Move a product to its current stock level in the stock indexes"""
+        with self.index_lock:
+            stock = self.indexed_stock[product.id]
+            if stock == product.stock:
+                return
+            self.indexed_stock[product.id] = product.stock
+            for key in (None, product.category):
+                index = self.stock_index.get(key)
+                if index is not None:
+                    discard(index, (stock, product.id))
+                    insort(index, (product.stock, product.id))
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+def price_bounds(index, low, high):
+    """Return the slice of a sorted (price, id) list with prices between low and high inclusive"""
+    start = 0 if low is None else bisect_left(index, (low,))
+    end = len(index) if high is None else bisect_right(index, (high, float('inf')))
+    return start, end
+
+def discard(index, entry):
+    """Remove an entry from a sorted list if present"""
+    position = bisect_left(index, entry)
+    if position < len(index) and index[position] == entry:
+        del index[position]
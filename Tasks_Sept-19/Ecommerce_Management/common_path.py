@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules shared by both systems live in Tasks_Sept-19/common, next to this project
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
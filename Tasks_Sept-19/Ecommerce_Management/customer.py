@@ -1,15 +1,19 @@
 class Customer:
+    __slots__ = ('name', 'orders', 'total_spent')
+    
     def __init__(self, name):
         self.name = name
         self.orders = []
+        self.total_spent = 0  # Running total, updated as orders are added
     
     def add_order(self, order):
         """Add an order to customer's order history"""
         self.orders.append(order)
+        self.total_spent += order.get_total()
     
     def get_total_spent(self):
         """Calculate total amount spent by customer"""
-        return sum(order.get_total() for order in self.orders)
+        return self.total_spent
     
     def __str__(self):
         return f"Customer: {self.name}, Orders: {len(self.orders)}, Total Spent: ₹{self.get_total_spent()}"
\ No newline at end of file
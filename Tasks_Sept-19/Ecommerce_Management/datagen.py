@@ -0,0 +1,57 @@
+import csv
+import json
+import os
+import random
+from datetime import datetime, timedelta
+import common_path
+from common.sampling import ZipfSampler
+
+CATEGORIES = ['Electronics', 'Furniture', 'Stationery', 'Clothing', 'Books', 'Toys', 'Sports',
+              'Kitchen', 'Beauty', 'Garden', 'Grocery', 'Automotive']
+
+def generate_products(num_products, rng=None):
+    """Yield product rows as [id, name, category, price, stock]"""
+    rng = rng or random
+    for product_id in range(1, num_products + 1):
+        category = CATEGORIES[product_id % len(CATEGORIES)]
+        # Prices are log-uniform so most products are cheap and a few are expensive
+        price = round(10 ** rng.uniform(2, 5))
+        yield [product_id, f"{category} Item {product_id}", category, price, rng.randint(0, 500)]
+
+def generate_orders(num_orders, num_products, num_customers=None, exponent=1.1, rng=None,
+                    start=datetime(2025, 1, 1), days=365):
+    """Yield order records with Zipfian product popularity and customer activity, placed in time order over days"""
+    rng = rng or random
+    num_customers = num_customers or max(1, num_orders // 10)
+    # Popular products are spread over the id range rather than being the lowest ids
+    product_ids = list(range(1, num_products + 1))
+    rng.shuffle(product_ids)
+    products = ZipfSampler(num_products, exponent, rng)
+    customers = ZipfSampler(num_customers, exponent, rng)
+    seconds_per_order = days * 86400 / max(1, num_orders)
+    for index, order_id in enumerate(range(101, 101 + num_orders)):
+        created_at = start + timedelta(seconds=int(index * seconds_per_order))
+        num_items = min(num_products, 1 + int(rng.expovariate(0.5)))
+        items = {}
+        while len(items) < num_items:
+            items.setdefault(product_ids[products.sample()], rng.randint(1, 5))
+        yield {
+            'order_id': order_id,
+            'customer': f"Customer {customers.sample() + 1}",
+            'items': [{'product_id': product_id, 'qty': qty} for product_id, qty in items.items()],
+            'created_at': created_at.isoformat()
+        }
+
+def write_dataset(directory, num_products, num_orders, num_customers=None, exponent=1.1, seed=42):
+    """Write a synthetic products.csv and orders.json into a directory"""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, 'products.csv'), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'name', 'category', 'price', 'stock'])
+        writer.writerows(generate_products(num_products, rng))
+
+    with open(os.path.join(directory, 'orders.json'), 'w') as file:
+        file.write('[\n')
+        for index, order in enumerate(generate_orders(num_orders, num_products, num_customers, exponent, rng)):
+            file.write((',\n' if index else '') + json.dumps(order))
+        file.write('\n]')
@@ -0,0 +1,155 @@
+import json
+import os
+
+def repair_tail(path):
+    """End a journal file on a complete line after a crash mid-write.
+
+    A last line cut short is removed, so the next record does not run on from it and hide
+    every record after it from replay. A last line that is whole but lost its newline keeps
+    its record and gets the newline.
+    """
+    try:
+        with open(path, 'rb+') as file:
+            size = file.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                step = min(4096, end)
+                file.seek(end - step)
+                newline = file.read(step).rfind(b'\n')
+                if newline != -1:
+                    end = end - step + newline + 1
+                    break
+                end -= step
+            if end == size:
+                return
+            file.seek(end)
+            try:
+                json.loads(file.read())
+                file.write(b'\n')
+            except ValueError:
+                file.truncate(end)
+            file.flush()
+            os.fsync(file.fileno())
+    except FileNotFoundError:
+        pass
+
+class OrderJournal:
+    def __init__(self, path='orders.journal', sync_every=32):
+        self.path = path
+        self.rotated_path = path + '.rotated'  # records waiting for a rewrite of the data files to finish
+        self.sync_every = sync_every  # fsync after this many appended records
+        self.file = None
+        self.pending = 0  # records written since the last fsync
+        self.entries = 0  # records in the journal since the last compaction
+
+    def open(self):
+        """Open the journal for appending"""
+        if self.file is None:
+            repair_tail(self.path)
+            self.file = open(self.path, 'a')
+
+    def record(self, order):
+        """Return the journal line for an order and the resulting stock levels of its products"""
+        record = order.to_record()
+        record['stock'] = {str(product.id): product.stock for product, _ in order.items}
+        return json.dumps(record) + '\n'
+
+    def append(self, order):
+        """Append an order and the resulting stock levels of its products"""
+        self.open()
+        self.file.write(self.record(order))
+        self.file.flush()
+        self.entries += 1
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+
+    def append_many(self, orders):
+        """Append several orders with a single write and a single fsync"""
+        if not orders:
+            return
+        self.open()
+        self.file.write(''.join(self.record(order) for order in orders))
+        self.entries += len(orders)
+        self.pending += len(orders)
+        self.sync()
+
+    def sync(self):
+        """Force all appended records to disk"""
+        if self.file is not None and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def replay(self):
+        """Yield journal records in the order they were written, starting with any rotated records"""
+        self.entries = 0
+        for path in (self.rotated_path, self.path):
+            try:
+                with open(path, 'r') as file:
+                    for line in file:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A torn write at the tail of the journal
+                            break
+                        if 'generation' in record:
+                            continue  # Header line written by truncate
+                        self.entries += 1
+                        yield record
+            except FileNotFoundError:
+                continue
+
+    def generation(self):
+        """Return how many times the data files have been rewritten and the journal emptied, 0 if never"""
+        try:
+            with open(self.path, 'r') as file:
+                record = json.loads(file.readline() or '{}')
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        return record.get('generation', 0)
+
+    def truncate(self, generation):
+        """Empty the journal once its records are part of the data files, starting it with their generation"""
+        self.close()
+        with open(self.path, 'w') as file:
+            file.write(json.dumps({'generation': generation}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries = 0
+
+    def rotate(self, generation):
+        """Move the journal's records aside for a rewrite of the data files and start a new journal.
+
+        Records still waiting from a rewrite that failed are kept, with the new ones appended after them.
+        """
+        self.close()
+        if os.path.exists(self.rotated_path):
+            repair_tail(self.rotated_path)
+            try:
+                with open(self.path, 'r') as journal, open(self.rotated_path, 'a') as rotated:
+                    for number, line in enumerate(journal):
+                        if number == 0 and line.startswith('{"generation"'):
+                            continue  # Header line written by truncate
+                        rotated.write(line)
+                    rotated.flush()
+                    os.fsync(rotated.fileno())
+            except FileNotFoundError:
+                pass
+        elif os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+        self.truncate(generation)
+
+    def discard_rotated(self):
+        """Delete the rotated records once the data files that include them are written"""
+        try:
+            os.remove(self.rotated_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Sync and close the journal file"""
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
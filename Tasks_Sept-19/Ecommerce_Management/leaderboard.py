@@ -0,0 +1,42 @@
+import argparse
+import contextlib
+import csv
+import io
+import sys
+import time
+from datetime import date
+from main import ECommerceSystem
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank every customer by total spend without loading the order history")
+    parser.add_argument('--orders', default='orders.json', help="JSON array or JSON Lines file of orders")
+    parser.add_argument('--start', type=date.fromisoformat, help="count orders placed on or after this YYYY-MM-DD date, in UTC")
+    parser.add_argument('--end', type=date.fromisoformat, help="count orders placed on or before this YYYY-MM-DD date, in UTC")
+    parser.add_argument('--top', type=int, help="only output this many customers")
+    parser.add_argument('--memory-mb', type=float, default=64, help="memory budget for sorting, in megabytes")
+    parser.add_argument('--output', help="CSV file to write, default is standard output")
+    parser.add_argument('--quiet', action='store_true', help="hide load messages")
+    args = parser.parse_args()
+
+    system = ECommerceSystem()
+    output = io.StringIO() if args.quiet else sys.stderr
+    with contextlib.redirect_stdout(output):
+        system.load_products()
+
+    start = time.perf_counter()
+    rows = system.iter_customer_leaderboard(args.orders, args.start, args.end, int(args.memory_mb * 1024 * 1024))
+    with open(args.output, 'w', newline='') if args.output else contextlib.nullcontext(sys.stdout) as file:
+        writer = csv.writer(file)
+        writer.writerow(['rank', 'customer', 'total_spent', 'orders'])
+        count = 0
+        for rank, customer_name, spend, orders in rows:
+            # Rows arrive in rank order and tied customers share a rank, so stop at the first rank past --top
+            if args.top is not None and rank > args.top:
+                break
+            writer.writerow([rank, customer_name, spend, orders])
+            count += 1
+    rows.close()
+    print(f"Wrote {count} customers in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import numpy as np
+
+CHUNK_SIZE = 4_000_000  # line items per vectorized pass, bounds temporary memory
+FLUSH_SIZE = 4096  # rows staged in lists before they are copied into the arrays in one go
+
+class GrowableArray:
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        """Append one value, doubling the capacity when full"""
+        if self.size == len(self.data):
+            self.reserve(2 * self.size)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        """Append a sequence of values"""
+        values = np.asarray(values, dtype=self.data.dtype)
+        if self.size + len(values) > len(self.data):
+            self.reserve(max(2 * len(self.data), self.size + len(values)))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def reserve(self, capacity):
+        """Grow the underlying array to hold at least capacity values"""
+        if capacity > len(self.data):
+            data = np.empty(capacity, dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def view(self):
+        """Return the filled part of the array"""
+        return self.data[:self.size]
+
+    def __len__(self):
+        return self.size
+
+class LineItemTable:
+    # The table is a second copy of the orders, kept alongside the Order objects rather than
+    # backing them, so enabling it adds memory instead of saving it: 12 bytes per line item and
+    # 12 per order, up to twice that while the arrays have spare capacity from doubling.
+    def __init__(self):
+        # Product columns, one row per product
+        self.product_ids = GrowableArray(np.int64)
+        self.prices = GrowableArray(np.float64)
+        self.category_codes = GrowableArray(np.int32)
+        self.product_rows = {}  # product id -> row
+        self.categories = []
+        self.category_index = {}  # category -> code
+
+        # Order columns, one row per order
+        self.order_ids = GrowableArray(np.int64)
+        self.order_customers = GrowableArray(np.int32)
+        self.customers = []
+        self.customer_index = {}  # customer name -> code
+
+        # Line item columns, one row per order item
+        self.item_orders = GrowableArray(np.int32)  # row in the order columns
+        self.item_products = GrowableArray(np.int32)  # row in the product columns
+        self.item_quantities = GrowableArray(np.int32)
+
+        # New rows are staged in lists and copied into the arrays a batch at a time
+        self.pending = {column: [] for column in (
+            'product_ids', 'prices', 'category_codes', 'order_ids', 'order_customers',
+            'item_orders', 'item_products', 'item_quantities')}
+        self.num_products = 0
+        self.num_orders = 0
+
+    def add_product(self, product):
+        """Add a product row and return its row number"""
+        row = self.product_rows.get(product.id)
+        if row is not None:
+            return row
+        if product.category not in self.category_index:
+            self.category_index[product.category] = len(self.categories)
+            self.categories.append(product.category)
+        row = self.product_rows[product.id] = self.num_products
+        self.num_products += 1
+        self.pending['product_ids'].append(product.id)
+        self.pending['prices'].append(product.price)
+        self.pending['category_codes'].append(self.category_index[product.category])
+        return row
+
+    def add_order(self, order):
+        """Add an order and its line items"""
+        name = order.customer.name
+        if name not in self.customer_index:
+            self.customer_index[name] = len(self.customers)
+            self.customers.append(name)
+        order_row = self.num_orders
+        self.num_orders += 1
+        pending = self.pending
+        pending['order_ids'].append(order.order_id)
+        pending['order_customers'].append(self.customer_index[name])
+        for product, quantity in order.items:
+            pending['item_orders'].append(order_row)
+            pending['item_products'].append(self.add_product(product))
+            pending['item_quantities'].append(quantity)
+        if len(pending['order_ids']) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Copy the staged rows into the arrays, one extend per column"""
+        for column, values in self.pending.items():
+            if values:
+                getattr(self, column).extend(values)
+                values.clear()
+
+    def grouped_sum(self, key_column, num_groups, weight_column='revenue'):
+        """Sum line item revenue or quantity per group, in chunks"""
+        self.flush()
+        totals = np.zeros(num_groups, dtype=np.float64)
+        prices = self.prices.view()
+        num_items = len(self.item_orders)
+        for start in range(0, num_items, CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, num_items)
+            products = self.item_products.data[start:end]
+            quantities = self.item_quantities.data[start:end]
+            if weight_column == 'revenue':
+                weights = prices[products] * quantities
+            else:
+                weights = quantities
+            keys = key_column(start, end, products)
+            totals += np.bincount(keys, weights=weights, minlength=num_groups)
+        return totals
+
+    def order_totals(self):
+        """Return total cost per order as a dict of order id -> total"""
+        totals = self.grouped_sum(lambda start, end, products: self.item_orders.data[start:end],
+                                  len(self.order_ids))
+        return dict(zip(self.order_ids.view().tolist(), totals.tolist()))
+
+    def revenue_by_category(self):
+        """Return revenue per category as a dict of category -> revenue"""
+        self.flush()
+        category_codes = self.category_codes.view()
+        totals = self.grouped_sum(lambda start, end, products: category_codes[products],
+                                  len(self.categories))
+        return dict(zip(self.categories, totals.tolist()))
+
+    def spend_by_customer(self):
+        """Return total spend per customer as a dict of name -> spend"""
+        self.flush()
+        order_customers = self.order_customers.view()
+        totals = self.grouped_sum(
+            lambda start, end, products: order_customers[self.item_orders.data[start:end]],
+            len(self.customers))
+        return dict(zip(self.customers, totals.tolist()))
+
+    def most_ordered_product(self):
+        """Return the id and total quantity of the most ordered product"""
+        self.flush()
+        if not len(self.item_products):
+            return None, 0
+        totals = self.grouped_sum(lambda start, end, products: products,
+                                  len(self.product_ids), weight_column='quantity')
+        row = int(np.argmax(totals))
+        return int(self.product_ids.data[row]), int(totals[row])
+
+    def sales_totals(self):
+        """Return revenue, category revenue, product quantities and customer spend,
+        in the same form as report_engine.compute_sales
+        """
+        category_revenue = self.revenue_by_category()
+        product_quantities = self.grouped_sum(lambda start, end, products: products,
+                                              len(self.product_ids), weight_column='quantity')
+        quantities = dict(zip(self.product_ids.view().tolist(), product_quantities.astype(np.int64).tolist()))
+        spend = self.spend_by_customer()
+        return {
+            'revenue': sum(category_revenue.values()),
+            'category_revenue': category_revenue,
+            'product_quantities': quantities,
+            'customer_spend': spend,
+            'orders': len(self.order_ids),
+            'top_product': max(quantities, key=quantities.get) if quantities else None,
+            'top_customer': max(spend, key=spend.get) if spend else None
+        }
+
+    def __len__(self):
+        self.flush()
+        return len(self.item_orders)
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter
+from urllib.parse import quote
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection to the service"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return the status code and decoded JSON body"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def build_plan(count, product_ids, categories, order_ratio, seed):
+    """Return (name, method, path, payload) requests in random order, about order_ratio of them orders"""
+    rng = random.Random(seed)
+    reads = [
+        ('list_products', lambda: ('GET', f"/products?page={rng.randint(1, 5)}", None)),
+        ('products_in_category', lambda: ('GET', f"/products?category={quote(rng.choice(categories))}", None)),
+        ('price_band', lambda: ('GET', f"/products?min_price={rng.randint(100, 1000)}&max_price={rng.randint(1000, 5000)}", None)),
+        ('search_products', lambda: ('GET', f"/products?q={quote(rng.choice(categories)[:3])}", None)),
+        ('list_orders', lambda: ('GET', "/orders?page=1", None)),
+        ('sales_report', lambda: ('GET', "/reports/sales", None)),
+        ('inventory_report', lambda: ('GET', "/reports/inventory", None)),
+    ]
+    plan = []
+    for _ in range(count):
+        if rng.random() < order_ratio:
+            items = [{'product_id': product_id, 'qty': rng.randint(1, 3)}
+                     for product_id in rng.sample(product_ids, min(rng.randint(1, 3), len(product_ids)))]
+            plan.append(('place_order', 'POST', '/orders',
+                         {'customer': f"Load Customer {rng.randint(1, 1000)}", 'items': items}))
+        else:
+            name, make = rng.choice(reads)
+            plan.append((name, *make()))
+    return plan
+
+async def worker(connection, plan, latencies, statuses):
+    """Send requests from the shared plan one after another on one connection"""
+    while plan:
+        name, method, path, payload = plan.pop()
+        start = time.perf_counter()
+        try:
+            status, _ = await connection.request(method, path, payload)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            connection.close()
+            status = type(e).__name__
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        statuses[status] += 1
+    connection.close()
+
+async def run(host, port, requests, concurrency, order_ratio, seed):
+    """Run the load test and return (elapsed seconds, latencies by request name, status counts)"""
+    setup = Connection(host, port)
+    _, products = await setup.request('GET', '/products?page_size=1000')
+    setup.close()
+    product_ids = [product['id'] for product in products['items']]
+    categories = sorted({product['category'] for product in products['items']}) or ['none']
+    if not product_ids:
+        raise SystemExit("The service has no products to order.")
+
+    plan = build_plan(requests, product_ids, categories, order_ratio, seed)
+    latencies = {}
+    statuses = Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(Connection(host, port), plan, latencies, statuses) for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, statuses
+
+def print_report(elapsed, latencies, statuses):
+    """Print latency percentiles per request type and overall throughput"""
+    print(f"{'request':<24}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    everything = []
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        everything.extend(values)
+        print(f"{name:<24}{len(values):>8}{percentile(values, 0.50) * 1000:>10.2f}"
+              f"{percentile(values, 0.99) * 1000:>10.2f}{values[-1] * 1000:>10.2f}")
+    everything.sort()
+    if everything:
+        print(f"{'all':<24}{len(everything):>8}{percentile(everything, 0.50) * 1000:>10.2f}"
+              f"{percentile(everything, 0.99) * 1000:>10.2f}{everything[-1] * 1000:>10.2f}")
+    print(f"\nStatus codes: {dict(sorted(statuses.items(), key=str))}")
+    print(f"Throughput: {len(everything) / elapsed if elapsed else 0:,.0f} requests/sec over {elapsed:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the e-commerce JSON service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=5000, help="total requests to send")
+    parser.add_argument('--concurrency', type=int, default=50, help="connections sending at once")
+    parser.add_argument('--order-ratio', type=float, default=0.3, help="fraction of requests that place orders")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    elapsed, latencies, statuses = asyncio.run(
+        run(args.host, args.port, args.requests, args.concurrency, args.order_ratio, args.seed))
+    print_report(elapsed, latencies, statuses)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'elapsed_seconds': elapsed, 'statuses': {str(k): v for k, v in statuses.items()},
+                       'latencies': {name: {'count': len(values), 'p50': percentile(values, 0.50),
+                                            'p99': percentile(values, 0.99)}
+                                     for name, values in latencies.items()}}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,88 @@
+import asyncio
 import csv
 import json
+import os
+import sys
+import threading
+from datetime import date
+from itertools import groupby, islice
+from operator import itemgetter
 from product import Product
 from customer import Customer
-from order import Order
+from order import Order, parse_time, utc_now
+from catalog import Catalog
+from journal import OrderJournal
+from segments import SegmentStore, segment_key
+import common_path
+from common.search_index import SearchIndex
+from common.external_sort import external_sort, ranked
+from common.write_behind import WriteBehind, atomic_open
+from common.streaming import iter_records, iter_batches, validated_batches
+from common.metrics import metrics
+from common.rendering import render, browse, write_lines
+from aggregates import SalesAggregates
+from report_engine import compute_sales, compute_inventory
+from snapshot import Snapshot, write_snapshot
+from async_loader import load_concurrently
+from sqlite_store import StoredOrders
+
+try:
+    from line_items import LineItemTable
+except ImportError:
+    LineItemTable = None  # NumPy not installed
 
 class ECommerceSystem:
-    def __init__(self):
-        self.products = []
+    def __init__(self, columnar=False, workers=None, flush_interval=2.0, compact_every=1000, store=None):
+        self.catalog = Catalog()
         self.customers = {}
+        self.customer_search = SearchIndex()  # name tokens -> customer names
         self.orders = []
+        self.last_order_id = 100
+        self.order_lock = threading.Lock()  # Guards orders, customers, totals and the journal
+        self.journal = OrderJournal()
+        self.generation = None  # Journal generation of the data files loaded, None until something is loaded
+        # Full files are rewritten in the background once compact_every orders build up in the journal
+        self.compactor = WriteBehind(interval=None, max_dirty=compact_every)
+        self.compactor.register('store', self.compact)
+        self.compact_lock = threading.Lock()  # One rewrite of the data files at a time
+        # Monthly order segments, rewritten every flush_interval seconds only for the months that changed
+        self.writer = WriteBehind(interval=flush_interval)
+        self.segments = SegmentStore()
+        self.segments_complete = False  # whether the manifest is known to cover every month in memory
+        self.writer.register('segments', self.write_segments, pass_keys=True)
+        self.sales = SalesAggregates()
+        self.workers = workers  # Processes for full report recomputes, None uses every core
+        # Database holding the data instead of products.csv, orders.json and the journal, e.g. a
+        # SQLiteStore. Orders are saved to it as they are placed and the reports run as its queries.
+        # Its orders are read from it as they are listed rather than kept in memory, though
+        # products and customer names still are, for stock checks and search.
+        self.store = store
+        if store is not None:
+            self.orders = StoredOrders(store, self.build_order)
+        
+        # Columnar line items for vectorized analytics. When enabled, sales reports are
+        # group-bys over this table and the running totals in self.sales are not kept.
+        self.line_items = None
+        if columnar:
+            if LineItemTable is None:
+                print("NumPy is not installed. Columnar analytics disabled.")
+            else:
+                self.line_items = LineItemTable()
+    
+    @property
+    def products(self):
+        """All products in catalogue order"""
+        return self.catalog.products
         
+    @metrics.timed()
     def load_products(self):
-        """Load products from CSV file"""
+        """Load products from CSV file, or from the store if there is one"""
+        if self.store is not None:
+            for product in self.store.iter_products():
+                self.catalog.add(product)
+            metrics.add(rows=len(self.catalog))
+            print("Products loaded successfully!")
+            return
         try:
             with open('products.csv', 'r') as file:
                 reader = csv.DictReader(file)
@@ -23,187 +94,614 @@ class ECommerceSystem:
                         float(row['price']),
                         int(row['stock'])
                     )
-                    self.products.append(product)
+                    self.catalog.add(product)
+            metrics.add(rows=len(self.catalog), bytes_read=os.path.getsize('products.csv'))
+            self.apply_journal_stock()
             print("Products loaded successfully!")
         except FileNotFoundError:
             print("Products file not found.")
         except Exception as e:
             print(f"Error loading products: {e}")
     
-    def load_orders(self):
-        """Load orders from JSON file"""
+    def apply_journal_stock(self):
+        """Apply stock levels recorded since the data files were last rewritten"""
+        self.generation = self.journal.generation()
+        for record in self.journal.replay():
+            for product_id, stock in record['stock'].items():
+                product = self.catalog.get(int(product_id))
+                if product:
+                    product.stock = stock
+                    self.catalog.reindex_stock(product)
+    
+    @metrics.timed()
+    def load_orders(self, on_batch=None, batch_size=1000):
+        """Load orders from JSON file, passing each batch of orders to on_batch if given.
+        
+        With a store only the last order id and the customer names are loaded.
+        """
+        if self.store is not None:
+            self.load_store_customers()
+            return
         try:
-            with open('orders.json', 'r') as file:
-                orders_data = json.load(file)
-                for order_data in orders_data:
-                    customer_name = order_data['customer']
-                    
-                    # Create customer if not exists
-                    if customer_name not in self.customers:
-                        self.customers[customer_name] = Customer(customer_name)
-                    
-                    # Create order
-                    order = Order(order_data['order_id'], self.customers[customer_name])
-                    
-                    # Add items to order
-                    for item in order_data['items']:
-                        product_id = item['product_id']
-                        quantity = item['qty']
-                        
-                        # Find product
-                        product = next((p for p in self.products if p.id == product_id), None)
-                        if product:
-                            order.add_item(product, quantity)
-                    
-                    self.orders.append(order)
-                    self.customers[customer_name].add_order(order)
+            for batch in iter_batches(self.stream_orders(), batch_size):
+                metrics.add(rows=len(batch))
+                if on_batch:
+                    on_batch(batch)
+            metrics.add(bytes_read=os.path.getsize('orders.json'))
             print("Orders loaded successfully!")
         except FileNotFoundError:
             print("Orders file not found.")
         except Exception as e:
             print(f"Error loading orders: {e}")
+        self.replay_journal_orders()
+    
+    def load_store_customers(self):
+        """Load the customer names and the last order id from the store, leaving its orders in it"""
+        try:
+            self.last_order_id = max(self.last_order_id, self.store.max_order_id() or 0)
+            for name in self.store.iter_customer_names():
+                if name not in self.customers:
+                    self.customers[name] = Customer(name)
+            metrics.add(rows=len(self.customers))
+            print("Orders loaded successfully!")
+        except Exception as e:
+            print(f"Error loading orders: {e}")
+    
+    @metrics.timed()
+    def load_all(self):
+        """Load products and orders concurrently, or one after the other on a single core"""
+        workers = self.workers or os.cpu_count() or 1
+        if workers > 1 and self.store is None:
+            try:
+                asyncio.run(load_concurrently(self))
+                self.index_customers()
+                return
+            except (OSError, NotImplementedError) as e:
+                print(f"Concurrent loading unavailable ({e}). Loading sequentially.")
+        self.load_products()
+        self.load_orders()
+        self.index_customers()
+    
+    def replay_journal_orders(self):
+        """Replay orders placed since the last snapshot"""
+        try:
+            loaded_ids = {order.order_id for order in self.orders}
+            for record in self.journal.replay():
+                if record['order_id'] not in loaded_ids:
+                    order = self.add_order_record(record)
+                    self.writer.mark_dirty('segments', segment_key(order.created_at))
+        except Exception as e:
+            print(f"Error replaying order journal: {e}")
+    
+    def stream_orders(self, path='orders.json'):
+        """Load orders one record at a time from a JSON array or JSON Lines file, yielding each order"""
+        for order_data in iter_records(path):
+            yield self.add_order_record(order_data)
+    
+    def add_order_record(self, order_data):
+        """Build an order from its saved form and attach it to its customer"""
+        items = ((item['product_id'], item['qty']) for item in order_data['items'])
+        return self.add_order(order_data['order_id'], order_data['customer'], items,
+                              parse_time(order_data.get('created_at')))
+    
+    def build_order(self, order_data):
+        """Build an order from its saved form without adding it to the system, for orders read from the store"""
+        customer = self.customers.get(order_data['customer']) or Customer(order_data['customer'])
+        order = Order(order_data['order_id'], customer, parse_time(order_data.get('created_at')))
+        for item in order_data['items']:
+            product = self.catalog.get(item['product_id'])
+            if product:
+                order.add_item(product, item['qty'])
+        return order
+    
+    def add_order(self, order_id, customer_name, items, created_at=None):
+        """Build an order from (product_id, quantity) pairs and attach it to its customer"""
+        # Create customer if not exists
+        if customer_name not in self.customers:
+            self.customers[customer_name] = Customer(customer_name)
+        
+        # Create order
+        order = Order(order_id, self.customers[customer_name], created_at)
+        
+        # Add items to order
+        for product_id, quantity in items:
+            # Find product
+            product = self.catalog.get(product_id)
+            if product:
+                order.add_item(product, quantity)
+        
+        self.orders.append(order)
+        self.last_order_id = max(self.last_order_id, order.order_id)
+        self.customers[customer_name].add_order(order)
+        if self.line_items is not None:
+            self.line_items.add_order(order)
+        else:
+            self.sales.add_order(order)
+        return order
     
     def save_products(self):
         """Save products to CSV file"""
         try:
-            with open('products.csv', 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(['id', 'name', 'category', 'price', 'stock'])
-                for product in self.products:
-                    writer.writerow([product.id, product.name, product.category, product.price, product.stock])
+            self.write_products()
             print("Products saved successfully!")
+            return True
         except Exception as e:
             print(f"Error saving products: {e}")
+            return False
+    
+    def product_rows(self):
+        """Return every product as an [id, name, category, price, stock] row"""
+        return [[product.id, product.name, product.category, product.price, product.stock]
+                for product in self.products]
+    
+    @metrics.timed()
+    def write_products(self, rows=None):
+        """Atomically write product rows, or all products, to CSV file, raising if the write fails"""
+        if rows is None:
+            rows = self.product_rows()
+        with atomic_open('products.csv', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['id', 'name', 'category', 'price', 'stock'])
+            writer.writerows(rows)
+        metrics.add(rows=len(rows), bytes_written=os.path.getsize('products.csv'))
     
     def save_orders(self):
         """Save orders to JSON file"""
         try:
-            orders_data = []
-            for order in self.orders:
-                order_data = {
-                    'order_id': order.order_id,
-                    'customer': order.customer.name,
-                    'items': [{'product_id': item['product'].id, 'qty': item['quantity']} 
-                             for item in order.items]
-                }
-                orders_data.append(order_data)
-            
-            with open('orders.json', 'w') as file:
-                json.dump(orders_data, file, indent=2)
+            self.write_orders()
             print("Orders saved successfully!")
+            return True
         except Exception as e:
             print(f"Error saving orders: {e}")
+            return False
     
-    def print_all_products(self):
-        """Print all available products"""
-        print("\n=== ALL PRODUCTS ===")
-        for product in self.products:
-            print(f"ID: {product.id}, Name: {product.name}, Category: {product.category}, "
-                  f"Price: ₹{product.price}, Stock: {product.stock}")
-    
-    def find_most_expensive_product(self):
-        """Find and return the most expensive product"""
-        if not self.products:
-            return None
-        return max(self.products, key=lambda p: p.price)
-    
-    def process_order(self, order):
-        """Process an order and update stock"""
-        for item in order.items:
-            product = item['product']
-            quantity = item['quantity']
-            product.update_stock(quantity)
-        self.orders.append(order)
-        order.customer.add_order(order)
-        self.save_products()
-        self.save_orders()
+    @metrics.timed()
+    def write_orders(self, orders=None):
+        """Atomically write the given orders, or all orders, to JSON file, raising if the write fails"""
+        if orders is None:
+            orders = self.orders
+        orders_data = [order.to_record() for order in orders]
+        with atomic_open('orders.json') as file:
+            json.dump(orders_data, file, indent=2)
+        metrics.add(rows=len(orders), bytes_written=os.path.getsize('orders.json'))
+    
+    @metrics.timed()
+    def save_snapshot(self, path='store.snapshot'):
+        """Save products and orders to a binary snapshot"""
+        try:
+            generation = self.generation if self.generation is not None else self.journal.generation()
+            write_snapshot(path, self.products, self.orders, generation)
+            metrics.add(rows=len(self.products) + len(self.orders), bytes_written=os.path.getsize(path))
+            print("Snapshot saved successfully!")
+            return True
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+            return False
+    
+    @metrics.timed()
+    def load_snapshot(self, path='store.snapshot'):
+        """Load products and orders from a binary snapshot instead of products.csv and orders.json,
+        then replay the orders journaled since. Loads the data files instead if they were
+        rewritten after the snapshot was taken, since the journal no longer holds those orders.
+        """
+        try:
+            with Snapshot(path) as snapshot:
+                generation = self.journal.generation()
+                current = snapshot.generation == generation
+                if current:
+                    for product in snapshot.iter_products():
+                        self.catalog.add(product)
+                    for order_data in snapshot.iter_order_records():
+                        self.add_order_record(order_data)
+                    metrics.add(rows=snapshot.product_count() + snapshot.order_count(),
+                                bytes_read=os.path.getsize(path))
+        except FileNotFoundError:
+            print("Snapshot file not found.")
+            return
+        except Exception as e:
+            print(f"Error loading snapshot: {e}")
+            return
+        if not current:
+            print(f"Snapshot is from data file generation {snapshot.generation} but the files are at "
+                  f"{generation}. Loading products.csv and orders.json instead.")
+            self.load_products()
+            self.load_orders()
+            return
+        self.apply_journal_stock()
+        self.replay_journal_orders()
+        print("Snapshot loaded successfully!")
+    
+    @metrics.timed()
+    def print_all_products(self, category=None, page=None, page_size=20, output=None, min_price=None, max_price=None):
+        """Print all available products, or one page of them, optionally only those in a category or price band.
+        
+        Products in a price band are listed cheapest first. Returns the number of pages.
+        """
+        if min_price is not None or max_price is not None:
+            products = self.catalog.in_price_range(min_price, max_price, category)
+        else:
+            products = self.products if category is None else self.catalog.in_category(category)
+        metrics.add(rows=len(products) if page is None else min(page_size, len(products)))
+        return render("ALL PRODUCTS", products, format_product, page, page_size, output)
+    
+    @metrics.timed()
+    def find_most_expensive_product(self, category=None):
+        """Find and return the most expensive product, optionally within a category"""
+        products = self.catalog.most_expensive(1, category)
+        return products[0] if products else None
+    
+    @metrics.timed()
+    def find_most_expensive_products(self, n=5, category=None):
+        """Return the n most expensive products, optionally within a category"""
+        return self.catalog.most_expensive(n, category)
+    
+    def get_customer(self, customer_name):
+        """Return the customer with the given name, creating it if not exists"""
+        with self.order_lock:
+            if customer_name not in self.customers:
+                self.customers[customer_name] = Customer(customer_name)
+            return self.customers[customer_name]
+    
+    def next_order_id(self):
+        """Allocate the next order id"""
+        with self.order_lock:
+            self.last_order_id += 1
+            return self.last_order_id
+    
+    @metrics.timed()
+    def process_order(self, order, persist=True):
+        """Process an order and update stock, returning False without placing it if any item is short"""
+        if not self.catalog.reserve(order.items):
+            return False
+        
+        if order.created_at is None:
+            order.created_at = utc_now()
+        with self.order_lock:
+            if persist and self.store is not None:
+                try:
+                    self.store.save_orders([order])
+                except Exception as e:
+                    print(f"Error saving order {order.order_id}: {e}")
+                    self.catalog.release(order.items)
+                    return False
+            self.last_order_id = max(self.last_order_id, order.order_id)
+            if self.store is not None:
+                return True  # self.orders reads it back from the store
+            self.orders.append(order)
+            order.customer.add_order(order)
+            if self.line_items is not None:
+                self.line_items.add_order(order)
+            else:
+                self.sales.add_order(order)
+            
+            # Only the new order is written now; full files are rewritten in the background
+            if persist:
+                self.journal.append(order)
+                self.compactor.mark_dirty('store', order.order_id)
+            self.writer.mark_dirty('segments', segment_key(order.created_at))
+        return True
+    
+    @metrics.timed()
+    def process_orders(self, orders):
+        """Process several orders and journal the placed ones in one write and fsync.
+        
+        Returns a placed flag for each order.
+        """
+        # A store saves each order in its own transaction, which needs no fsync in SQLite's WAL mode
+        placed = [self.process_order(order, persist=self.store is not None) for order in orders]
+        placed_orders = [order for order, success in zip(orders, placed) if success]
+        if placed_orders and self.store is None:
+            with self.order_lock:
+                self.journal.append_many(placed_orders)
+                for order in placed_orders:
+                    self.compactor.mark_dirty('store', order.order_id)
+        metrics.add(rows=len(orders))
+        return placed
+    
+    def validate_order_record(self, record):
+        """Return an error message for an invalid order record, or None"""
+        if not isinstance(record, dict):
+            return "Record is not an object"
+        if not isinstance(record.get('customer'), str) or not record['customer'].strip():
+            return "Missing customer name"
+        if not isinstance(record.get('items'), list) or not record['items']:
+            return "Order has no items"
+        for item in record['items']:
+            # bool is a subclass of int, and True would otherwise find product 1
+            if (not isinstance(item, dict) or isinstance(item.get('product_id'), bool)
+                    or not self.catalog.get(item.get('product_id'))):
+                return f"Invalid product ID: {item.get('product_id') if isinstance(item, dict) else item}"
+            if isinstance(item.get('qty'), bool) or not isinstance(item.get('qty'), int) or item['qty'] <= 0:
+                return f"Quantity must be a positive integer for product {item['product_id']}"
+        if 'created_at' in record:
+            try:
+                parse_time(record['created_at'])
+            except (TypeError, ValueError):
+                return f"Invalid created_at: {record['created_at']}"
+        return None
+    
+    @metrics.timed()
+    def import_orders(self, records, batch_size=1000):
+        """Validate and place orders in batches without prompting, rewriting the data files once at the end.
+        
+        Each batch of placed orders is journaled with one fsync, so they are kept even if the
+        final rewrite fails. Returns the number of orders placed and a list of (record number, error) pairs.
+        """
+        placed = 0
+        errors = []
+        for batch in validated_batches(records, self.validate_order_record, errors, batch_size):
+            orders = []
+            for number, record in batch:
+                order = Order(self.next_order_id(), self.get_customer(record['customer']),
+                              parse_time(record.get('created_at')))
+                for item in record['items']:
+                    order.add_item(self.catalog.get(item['product_id']), item['qty'])
+                orders.append(order)
+            for (number, _), success in zip(batch, self.process_orders(orders)):
+                if success:
+                    placed += 1
+                else:
+                    errors.append((number, "Insufficient stock"))
+        
+        if placed and self.store is None:
+            self.compactor.mark_dirty('store')
+            self.compactor.flush()
+            self.writer.flush('segments')
+        return placed, errors
+    
+    @metrics.timed()
+    def compact(self):
+        """Rewrite products and orders in full and drop the journal records they include, raising if a write fails"""
+        with self.compact_lock:
+            # Only copying the state and rotating the journal hold up new orders. Orders placed
+            # while the files are written go to the new journal and are not in the copy.
+            with self.order_lock:
+                self.journal.sync()
+                generation = self.journal.generation()
+                if self.generation is not None and generation != self.generation:
+                    raise RuntimeError(f"Data files were rewritten elsewhere (generation {generation}, "
+                                       f"loaded {self.generation}). Not overwriting them.")
+                rows = self.product_rows()
+                orders = list(self.orders)
+                self.generation = generation + 1
+                self.journal.rotate(self.generation)
+            # The rotated records are kept if either write fails, so no order is lost
+            self.write_products(rows)
+            self.write_orders(orders)
+            self.journal.discard_rotated()
+    
+    def segments_cover_orders(self, keys=()):
+        """Check the segment manifest has every month of the orders in memory, apart from keys about to be written"""
+        months = {segment_key(order.created_at) for order in self.orders}
+        return self.segments.covers(months - set(keys))
+    
+    @metrics.timed()
+    def write_segments(self, keys=None):
+        """Rewrite the monthly order segments with the given keys, or all of them.
+        
+        Keyed writes update the manifest in place, so until it is known to cover every
+        month in memory a keyed write rewrites all segments instead.
+        """
+        if keys is not None and not self.segments_complete and not self.segments_cover_orders(keys):
+            keys = None
+        self.segments.write(self.orders, keys)
+        self.segments_complete = True
+    
+    def get_sales_between(self, start=None, end=None):
+        """Return sales totals for orders placed between two dates, both inclusive, from the order segments"""
+        if not self.segments_complete:
+            if self.segments_cover_orders():
+                self.segments_complete = True
+            else:
+                self.writer.mark_dirty('segments')  # no key rewrites every month
+        self.writer.flush('segments')
+        return self.segments.sales(self.catalog, start, end)
+    
+    def close(self):
+        """Write out everything still pending and close the journal and the store"""
+        if self.journal.entries:
+            self.compactor.mark_dirty('store')
+        self.writer.close()
+        self.compactor.close()
+        self.journal.close()
+        if self.store is not None:
+            self.store.close()
+    
+    def index_customers(self):
+        """Add customers created since the last call to the name search index"""
+        with self.order_lock:
+            # Customers are only ever added, so the new ones are at the end of the dict
+            for name in islice(self.customers, len(self.customer_search), None):
+                self.customer_search.add(name, name)
+    
+    @metrics.timed()
+    def search_products(self, query, limit=20):
+        """Return up to limit products matching the query by name or category, best match first"""
+        return self.catalog.search_products(query, limit)
+    
+    @metrics.timed()
+    def search_customers(self, query, limit=20):
+        """Return up to limit customers matching the query by name, best match first"""
+        self.index_customers()
+        return [self.customers[name] for name in self.customer_search.search(query, limit)]
     
     def get_customer_orders(self, customer_name):
         """Get all orders for a customer"""
+        if self.store is not None:
+            return StoredOrders(self.store, self.build_order, customer_name)
         if customer_name in self.customers:
             return self.customers[customer_name].orders
         return []
     
+    def iter_order_records(self, path='orders.json'):
+        """Stream every saved order record, including orders only in the journal, without building orders"""
+        if self.store is not None:
+            yield from self.store.iter_order_records()
+            return
+        journal_records = {record['order_id']: record for record in self.journal.replay()}
+        try:
+            for record in iter_records(path):
+                if record['order_id'] not in journal_records:
+                    yield record
+        except FileNotFoundError:
+            pass
+        yield from journal_records.values()
+    
+    def iter_customer_leaderboard(self, path='orders.json', start=None, end=None, memory_limit=64 * 1024 * 1024):
+        """Yield (rank, customer name, total spend, order count) for every customer, highest spend first.
+        
+        Orders are streamed from file and ranked with external sorts, so order history larger than
+        memory is ranked within about memory_limit bytes. Products must be loaded to price the orders.
+        Only orders placed between the start and end dates, both inclusive, are counted if given.
+        """
+        def order_spends():
+            for record in self.iter_order_records(path):
+                if start is not None or end is not None:
+                    created_at = parse_time(record.get('created_at'))
+                    if created_at is None or (start is not None and created_at.date() < start) \
+                            or (end is not None and created_at.date() > end):
+                        continue
+                total = 0
+                for item in record['items']:
+                    product = self.catalog.get(item['product_id'])
+                    if product:
+                        total += product.price * item['qty']
+                yield record['customer'], total
+        
+        def customer_totals(spends):
+            # Spends arrive grouped by customer, so each customer is summed and dropped in turn
+            for customer_name, group in groupby(spends, key=itemgetter(0)):
+                spend = 0
+                count = 0
+                for _, total in group:
+                    spend += total
+                    count += 1
+                yield -spend, customer_name, count
+        
+        by_customer = external_sort(order_spends(), key=itemgetter(0), memory_limit=memory_limit // 2)
+        leaderboard = external_sort(customer_totals(by_customer), memory_limit=memory_limit // 2)
+        for rank, (negative_spend, customer_name, count) in ranked(leaderboard, score=itemgetter(0)):
+            yield rank, customer_name, -negative_spend, count
+    
     def print_order_totals(self):
         """Print customer names and total bills for all orders"""
-        print("\n=== ORDER TOTALS ===")
-        for order in self.orders:
-            print(f"Customer: {order.customer.name}, Total: ₹{order.get_total()}")
+        sys.stdout.write("\n=== ORDER TOTALS ===\n")
+        write_lines(f"Customer: {order.customer.name}, Total: ₹{order.get_total()}" for order in self.orders)
     
+    @metrics.timed()
     def find_most_ordered_product(self):
         """Find the product with the highest total quantity ordered"""
-        product_quantities = {}
-        for order in self.orders:
-            for item in order.items:
-                product_id = item['product'].id
-                quantity = item['quantity']
-                if product_id in product_quantities:
-                    product_quantities[product_id] += quantity
-                else:
-                    product_quantities[product_id] = quantity
+        if self.store is not None:
+            product_id, quantity = self.store.most_ordered_product()
+            return self.catalog.get(product_id), quantity
+        if self.line_items is not None:
+            with self.order_lock:
+                product_id, quantity = self.line_items.most_ordered_product()
+            return self.catalog.get(product_id), quantity
         
-        if not product_quantities:
+        top_products = self.sales.top_products(1)
+        if not top_products:
             return None, 0
         
-        max_product_id = max(product_quantities, key=product_quantities.get)
-        max_product = next((p for p in self.products if p.id == max_product_id), None)
-        return max_product, product_quantities[max_product_id]
+        max_product_id, quantity = top_products[0]
+        max_product = self.catalog.get(max_product_id)
+        return max_product, quantity
+    
+    @metrics.timed()
+    def rebuild_sales(self):
+        """Recompute the running sales totals from the full order history across worker processes"""
+        if self.line_items is not None:
+            return  # Columnar reports are always computed from the full line item table
+        self.sales.load_totals(compute_sales(self.orders, self.workers))
     
-    def generate_sales_report(self):
-        """Generate sales report with total revenue, revenue by category, and top customer"""
+    def get_sales_report(self, recompute=False, start=None, end=None):
+        """Return the order count, total revenue, revenue by category and top customer,
+        over all orders or only those placed between the start and end dates
+        """
+        if self.store is not None:
+            return self.store.sales_totals(start, end)
+        if start is not None or end is not None:
+            # Only the order segments for the range are read
+            totals = self.get_sales_between(start, end)
+            top_customer = totals['top_customer']
+            return {'orders': totals['orders'], 'revenue': totals['revenue'],
+                    'category_revenue': dict(totals['category_revenue']), 'top_customer': top_customer,
+                    'top_spend': totals['customer_spend'].get(top_customer)}
+        
+        if self.line_items is not None:
+            with self.order_lock:
+                totals = self.line_items.sales_totals()
+            top_customer = totals['top_customer']
+            return {'orders': totals['orders'], 'revenue': totals['revenue'],
+                    'category_revenue': totals['category_revenue'], 'top_customer': top_customer,
+                    'top_spend': totals['customer_spend'].get(top_customer)}
+        
+        if recompute:
+            self.rebuild_sales()
+        with self.order_lock:
+            top_customers = self.sales.top_customers(1)
+            top_customer = top_customers[0][0] if top_customers else None
+            return {'orders': len(self.orders), 'revenue': self.sales.total_revenue,
+                    'category_revenue': dict(self.sales.revenue_by_category), 'top_customer': top_customer,
+                    'top_spend': self.customers[top_customer].get_total_spent() if top_customer else None}
+    
+    @metrics.timed()
+    def generate_sales_report(self, recompute=False, start=None, end=None):
+        """Generate sales report with total revenue, revenue by category, and top customer,
+        over all orders or only those placed between the start and end dates
+        """
         print("\n=== SALES REPORT ===")
+        report = self.get_sales_report(recompute, start, end)
+        if start is not None or end is not None:
+            print(f"Orders from {start or 'the beginning'} to {end or 'today'}: {report['orders']}")
         
         # Total revenue
-        total_revenue = sum(order.get_total() for order in self.orders)
-        print(f"Total Revenue: ₹{total_revenue}")
+        print(f"Total Revenue: ₹{report['revenue']}")
         
         # Revenue by category
-        category_revenue = {}
-        for order in self.orders:
-            for item in order.items:
-                category = item['product'].category
-                revenue = item['product'].price * item['quantity']
-                if category in category_revenue:
-                    category_revenue[category] += revenue
-                else:
-                    category_revenue[category] = revenue
-        
         print("\nRevenue by Category:")
-        for category, revenue in category_revenue.items():
+        for category, revenue in report['category_revenue'].items():
             print(f"{category}: ₹{revenue}")
         
         # Customer with highest spending
-        if self.customers:
-            top_customer = max(self.customers.values(), key=lambda c: c.get_total_spent())
-            print(f"\nTop Customer: {top_customer.name} - ₹{top_customer.get_total_spent()}")
+        if report['top_customer']:
+            print(f"\nTop Customer: {report['top_customer']} - ₹{report['top_spend']}")
+    
+    def get_inventory_report(self, recompute=False, threshold=None):
+        """Return the low stock threshold, the products below it (lowest stock first) and average prices by category"""
+        if threshold is None:
+            threshold = self.catalog.low_stock_threshold
+        if self.store is not None:
+            return {'threshold': threshold, 'low_stock': self.store.low_stock(threshold),
+                    'average_prices': self.store.average_prices()}
+        if recompute:
+            # Full scan across worker processes instead of the catalogue indexes
+            totals = compute_inventory(self.products, threshold, self.workers)
+            low_stock_products = sorted((self.catalog.get(product_id) for product_id in totals['low_stock']),
+                                        key=lambda p: (p.stock, p.id))
+            average_prices = totals['average_prices']
+        else:
+            low_stock_products = self.catalog.get_low_stock(threshold)
+            average_prices = self.catalog.get_average_prices()
+        return {'threshold': threshold, 'low_stock': low_stock_products, 'average_prices': average_prices}
     
-    def generate_inventory_report(self):
+    @metrics.timed()
+    def generate_inventory_report(self, recompute=False, threshold=None):
         """Generate inventory report with low stock alerts and average prices by category"""
         print("\n=== INVENTORY REPORT ===")
+        report = self.get_inventory_report(recompute, threshold)
         
         # Low stock alert
-        low_stock_products = [p for p in self.products if p.stock < 5]
-        if low_stock_products:
-            print("Low Stock Alert (stock < 5):")
-            for product in low_stock_products:
+        if report['low_stock']:
+            print(f"Low Stock Alert (stock < {report['threshold']}):")
+            for product in report['low_stock']:
                 print(f"{product.name}: {product.stock} remaining")
         else:
             print("No products with low stock.")
         
         # Average price by category
-        category_prices = {}
-        category_counts = {}
-        for product in self.products:
-            if product.category in category_prices:
-                category_prices[product.category] += product.price
-                category_counts[product.category] += 1
-            else:
-                category_prices[product.category] = product.price
-                category_counts[product.category] = 1
-        
         print("\nAverage Price by Category:")
-        for category, total_price in category_prices.items():
-            avg_price = total_price / category_counts[category]
+        for category, avg_price in report['average_prices'].items():
             print(f"{category}: ₹{avg_price:.2f}")
     
     def place_new_order(self):
@@ -212,22 +710,22 @@ class ECommerceSystem:
         
         # Get customer name
         customer_name = input("Enter customer name: ")
-        if customer_name not in self.customers:
-            self.customers[customer_name] = Customer(customer_name)
+        customer = self.get_customer(customer_name)
         
         # Create new order
-        new_order_id = max([order.order_id for order in self.orders], default=100) + 1
-        order = Order(new_order_id, self.customers[customer_name])
+        order = Order(self.next_order_id(), customer)
+        
+        # Show the first page once; View Products browses the rest
+        self.print_all_products(page=1)
         
         # Add items to order
         while True:
-            self.print_all_products()
             try:
                 product_id = int(input("Enter product ID to add to order (0 to finish): "))
                 if product_id == 0:
                     break
                 
-                product = next((p for p in self.products if p.id == product_id), None)
+                product = self.catalog.get(product_id)
                 if not product:
                     print("Invalid product ID.")
                     continue
@@ -255,30 +753,33 @@ class ECommerceSystem:
         print(f"\nOrder Summary: Total: ₹{order.get_total()}")
         confirm = input("Confirm order? (y/n): ").lower()
         if confirm == 'y':
-            self.process_order(order)
-            print("Order placed successfully!")
+            if self.process_order(order):
+                print("Order placed successfully!")
+            else:
+                print("Insufficient stock. Order not placed.")
         else:
             print("Order cancelled.")
     
-    def view_all_orders(self):
-        """Display all orders"""
-        print("\n=== ALL ORDERS ===")
-        if not self.orders:
-            print("No orders found.")
-            return
+    @metrics.timed()
+    def view_all_orders(self, customer_name=None, page=None, page_size=10, output=None):
+        """Display all orders, or one page of them, optionally only those of one customer.
         
-        for order in self.orders:
-            print(f"\nOrder ID: {order.order_id}, Customer: {order.customer.name}")
-            print("Items:")
-            for item in order.items:
-                print(f"  - {item['product'].name} (Qty: {item['quantity']}, Price: ₹{item['product'].price})")
-            print(f"Total: ₹{order.get_total()}")
+        Returns the number of pages.
+        """
+        orders = self.orders if customer_name is None else self.get_customer_orders(customer_name)
+        if not orders:
+            (output or sys.stdout).write("\n=== ALL ORDERS ===\nNo orders found.\n")
+            return 1
+        
+        metrics.add(rows=len(orders) if page is None else min(page_size, len(orders)))
+        return render("ALL ORDERS", orders, format_order, page, page_size, output)
     
     def run_menu(self):
         """Run the main menu interface"""
+        profile_path = metrics.start_from_environment()
+        
         # Load data
-        self.load_products()
-        self.load_orders()
+        self.load_all()
         
         while True:
             print("\n=== E-COMMERCE ORDER MANAGEMENT SYSTEM ===")
@@ -287,13 +788,23 @@ class ECommerceSystem:
             print("3. View All Orders")
             print("4. Generate Sales Report")
             print("5. Generate Inventory Report")
-            print("6. Exit")
+            print("6. Show Metrics")
+            print("7. Search")
+            print("8. Exit")
             
-            choice = input("Enter your choice (1-6): ")
+            choice = input("Enter your choice (1-8): ")
             
             if choice == '1':
-                self.print_all_products()
-                most_expensive = self.find_most_expensive_product()
+                category = input("Category (leave blank for all): ").strip() or None
+                try:
+                    price_band = input("Price range as min-max (leave blank for all): ").strip()
+                    min_price, max_price = (float(bound) if bound.strip() else None
+                                            for bound in price_band.split('-')) if price_band else (None, None)
+                except ValueError:
+                    print("Please enter the price range as min-max, e.g. 100-500.")
+                    continue
+                browse(lambda page: self.print_all_products(category, page, min_price=min_price, max_price=max_price))
+                most_expensive = self.find_most_expensive_product(category)
                 if most_expensive:
                     print(f"\nMost Expensive Product: {most_expensive.name} - ₹{most_expensive.price}")
                 
@@ -305,22 +816,76 @@ class ECommerceSystem:
                 self.place_new_order()
             
             elif choice == '3':
-                self.view_all_orders()
+                customer_name = input("Customer (leave blank for all): ").strip() or None
+                if customer_name and customer_name not in self.customers:
+                    # Fall back to the best name match
+                    matches = self.search_customers(customer_name, 1)
+                    if matches:
+                        customer_name = matches[0].name
+                        print(f"Showing orders for {customer_name}")
+                browse(lambda page: self.view_all_orders(customer_name, page))
             
             elif choice == '4':
-                self.generate_sales_report()
+                try:
+                    start = input("Start date in UTC (YYYY-MM-DD, leave blank for all orders): ").strip()
+                    end = input("End date in UTC (YYYY-MM-DD, leave blank for today): ").strip() if start else ''
+                    self.generate_sales_report(start=date.fromisoformat(start) if start else None,
+                                               end=date.fromisoformat(end) if end else None)
+                except ValueError:
+                    print("Please enter dates as YYYY-MM-DD.")
             
             elif choice == '5':
-                self.generate_inventory_report()
+                threshold = input(f"Low stock threshold (leave blank for {self.catalog.low_stock_threshold}): ").strip()
+                if threshold and not threshold.isdigit():
+                    print("Please enter a whole number.")
+                    continue
+                self.generate_inventory_report(threshold=int(threshold) if threshold else None)
             
             elif choice == '6':
+                metrics.show()
+            
+            elif choice == '7':
+                self.search_menu()
+            
+            elif choice == '8':
+                self.close()
+                if profile_path:
+                    print(metrics.stop_profiling(profile_path))
                 print("Thank you for using the E-Commerce Order Management System!")
                 break
             
             else:
                 print("Invalid choice. Please try again.")
 
+    def search_menu(self):
+        """Search products and customers by name"""
+        query = input("Search for: ").strip()
+        if not query:
+            return
+        
+        products = self.search_products(query, 10)
+        print("\n=== MATCHING PRODUCTS ===")
+        write_lines([format_product(product) for product in products] or ["No products found."])
+        
+        customers = self.search_customers(query, 10)
+        print("\n=== MATCHING CUSTOMERS ===")
+        write_lines([f"{customer.name} - {len(self.get_customer_orders(customer.name))} orders" for customer in customers]
+                    or ["No customers found."])
+
+def format_product(product):
+    """Return the listing line for a product"""
+    return (f"ID: {product.id}, Name: {product.name}, Category: {product.category}, "
+            f"Price: ₹{product.price}, Stock: {product.stock}")
+
+def format_order(order):
+    """Return the listing lines for an order and its items"""
+    lines = [f"\nOrder ID: {order.order_id}, Customer: {order.customer.name}", "Items:"]
+    for product, quantity in order.items:
+        lines.append(f"  - {product.name} (Qty: {quantity}, Price: ₹{product.price})")
+    lines.append(f"Total: ₹{order.get_total()}")
+    return "\n".join(lines)
+
 # Run the program
 if __name__ == "__main__":
     system = ECommerceSystem()
-    system.run_menu()
\ No newline at end of file
+    system.run_menu()
\ No newline at end of file
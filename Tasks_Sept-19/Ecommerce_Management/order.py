@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+def utc_now():
+    """Return the current time as naive UTC to the second, the form every order time is kept in"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+def parse_time(value):
+    """Parse a saved ISO 8601 order time, or return None for orders saved without one.
+    
+    Order times are naive UTC, so a time with a UTC offset is converted to naive UTC.
+    """
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(value)
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+class Order:
+    __slots__ = ('order_id', 'customer', 'items', 'total', 'created_at')
+    
+    def __init__(self, order_id, customer, created_at=None):
+        self.order_id = order_id
+        self.customer = customer
+        self.items = []  # List of (product, quantity) tuples
+        self.total = 0  # Running total, updated as items are added
+        self.created_at = created_at  # datetime the order was placed, None for older orders
+    
+    def add_item(self, product, quantity):
+        """Add a product to the order"""
+        self.items.append((product, quantity))
+        self.total += product.price * quantity
+    
+    def get_total(self):
+        """Calculate total cost of the order"""
+        return self.total
+    
+    def to_record(self):
+        """Return the order in the form it is saved in orders.json"""
+        record = {
+            'order_id': self.order_id,
+            'customer': self.customer.name,
+            'items': [{'product_id': product.id, 'qty': quantity} for product, quantity in self.items]
+        }
+        if self.created_at is not None:
+            record['created_at'] = self.created_at.isoformat()
+        return record
+    
+    def __str__(self):
+        return f"Order #{self.order_id} - Customer: {self.customer.name}, Total: ₹{self.get_total()}"
\ No newline at end of file
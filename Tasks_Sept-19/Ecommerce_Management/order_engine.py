@@ -0,0 +1,34 @@
+import asyncio
+import threading
+from order import Order
+
+class OrderEngine:
+    def __init__(self, system):
+        self.system = system
+        self.stats_lock = threading.Lock()
+        self.placed = 0
+        self.rejected = 0
+
+    def place_order(self, customer_name, items):
+        """Place an order from (product_id, quantity) pairs. Safe to call from many threads at once.
+        
+        Returns the placed Order, or None if a product is unknown or out of stock.
+        """
+        order = None
+        if items and all(quantity > 0 and self.system.catalog.get(product_id) for product_id, quantity in items):
+            order = Order(self.system.next_order_id(), self.system.get_customer(customer_name))
+            for product_id, quantity in items:
+                order.add_item(self.system.catalog.get(product_id), quantity)
+            if not self.system.process_order(order):
+                order = None
+        
+        with self.stats_lock:
+            if order:
+                self.placed += 1
+            else:
+                self.rejected += 1
+        return order
+
+    async def place_order_async(self, customer_name, items):
+        """Place an order from an asyncio task without blocking the event loop"""
+        return await asyncio.to_thread(self.place_order, customer_name, items)
@@ -1,4 +1,6 @@
 class Product:
+    __slots__ = ('id', 'name', 'category', 'price', 'stock')
+    
     def __init__(self, id, name, category, price, stock):
         self.id = id
         self.name = name
@@ -6,14 +8,5 @@ class Product:
         self.price = price
         self.stock = stock
     
-    def update_stock(self, qty):
-        """Decrease stock after purchase"""
-        if self.stock >= qty:
-            self.stock -= qty
-            return True
-        else:
-            print(f"Insufficient stock for {self.name}. Available: {self.stock}, Requested: {qty}")
-            return False
-    
     def __str__(self):
         return f"{self.name} (₹{self.price}) - {self.stock} in stock"
\ No newline at end of file
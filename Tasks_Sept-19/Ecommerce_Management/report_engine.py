@@ -0,0 +1,90 @@
+from functools import partial
+import common_path
+from common.sharding import run_sharded
+
+def order_rows(orders):
+    """Flatten orders into plain tuples that are cheap to send to worker processes"""
+    return [(order.customer.name, [(product.id, product.category, product.price, quantity)
+                                   for product, quantity in order.items])
+            for order in orders]
+
+def sales_partial(rows):
+    """Compute sales totals for one shard of order rows"""
+    revenue = 0
+    category_revenue = {}
+    product_quantities = {}
+    customer_spend = {}
+    for customer_name, items in rows:
+        order_total = 0
+        for product_id, category, price, quantity in items:
+            order_total += price * quantity
+            category_revenue[category] = category_revenue.get(category, 0) + price * quantity
+            product_quantities[product_id] = product_quantities.get(product_id, 0) + quantity
+        revenue += order_total
+        customer_spend[customer_name] = customer_spend.get(customer_name, 0) + order_total
+    return {
+        'revenue': revenue,
+        'category_revenue': category_revenue,
+        'product_quantities': product_quantities,
+        'customer_spend': customer_spend,
+        'orders': len(rows)
+    }
+
+def merge_sales(partials):
+    """Merge per-shard sales totals"""
+    merged = {
+        'revenue': 0,
+        'category_revenue': {},
+        'product_quantities': {},
+        'customer_spend': {},
+        'orders': 0
+    }
+    for shard_totals in partials:
+        merged['revenue'] += shard_totals['revenue']
+        merged['orders'] += shard_totals['orders']
+        for key in ('category_revenue', 'product_quantities', 'customer_spend'):
+            totals = merged[key]
+            for name, value in shard_totals[key].items():
+                totals[name] = totals.get(name, 0) + value
+
+    # Argmax over the merged totals
+    quantities = merged['product_quantities']
+    spend = merged['customer_spend']
+    merged['top_product'] = max(quantities, key=quantities.get) if quantities else None
+    merged['top_customer'] = max(spend, key=spend.get) if spend else None
+    return merged
+
+def compute_sales(orders, workers=None):
+    """Compute sales totals over all orders, sharded across worker processes"""
+    return run_sharded(sales_partial, merge_sales, order_rows(orders), workers)
+
+def inventory_partial(rows, threshold):
+    """Compute inventory totals for one shard of (id, category, price, stock) rows"""
+    low_stock = []
+    category_prices = {}
+    category_counts = {}
+    for product_id, category, price, stock in rows:
+        if stock < threshold:
+            low_stock.append(product_id)
+        category_prices[category] = category_prices.get(category, 0) + price
+        category_counts[category] = category_counts.get(category, 0) + 1
+    return {'low_stock': low_stock, 'category_prices': category_prices, 'category_counts': category_counts}
+
+def merge_inventory(partials):
+    """Merge per-shard inventory totals"""
+    low_stock = []
+    category_prices = {}
+    category_counts = {}
+    for shard_totals in partials:
+        low_stock.extend(shard_totals['low_stock'])
+        for category, total_price in shard_totals['category_prices'].items():
+            category_prices[category] = category_prices.get(category, 0) + total_price
+            category_counts[category] = category_counts.get(category, 0) + shard_totals['category_counts'][category]
+    average_prices = {category: total_price / category_counts[category]
+                      for category, total_price in category_prices.items()}
+    return {'low_stock': low_stock, 'average_prices': average_prices}
+
+def compute_inventory(products, threshold=5, workers=None):
+    """Compute low stock product ids and average price per category, sharded across worker processes"""
+    rows = [(p.id, p.category, p.price, p.stock) for p in products]
+    return run_sharded(partial(inventory_partial, threshold=threshold), merge_inventory, rows, workers)
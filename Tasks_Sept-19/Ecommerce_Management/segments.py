@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import date, timedelta
+from report_engine import order_rows, sales_partial, merge_sales
+import common_path
+from common.streaming import iter_records
+from common.write_behind import atomic_open
+from order import parse_time
+
+UNDATED = 'undated'  # Segment for orders saved before orders had times
+
+def segment_key(created_at):
+    """Return the monthly segment an order time belongs to, as YYYY-MM"""
+    return created_at.strftime('%Y-%m') if created_at is not None else UNDATED
+
+def segment_bounds(key):
+    """Return the first day of a segment's month and the first day of the next month"""
+    year, month = map(int, key.split('-'))
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+class SegmentStore:
+    def __init__(self, directory='order_segments'):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+
+    def path(self, key):
+        return os.path.join(self.directory, f"orders-{key}.jsonl")
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def covers(self, keys):
+        """Check that the manifest has a summary for every one of the given segment keys"""
+        return self.exists() and set(keys) <= set(self.read_manifest())
+
+    def read_manifest(self):
+        """Return segment key -> summary of every segment on disk"""
+        try:
+            with open(self.manifest_path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def write(self, orders, keys=None):
+        """Rewrite the segments with the given keys, or all of them, from the orders in memory.
+        
+        Each segment is a JSON Lines file of one month of orders. Its sales totals
+        are kept in the manifest so reports covering the whole month need not read it.
+        """
+        groups = {key: [] for key in keys} if keys is not None else {}
+        for order in orders:
+            key = segment_key(order.created_at)
+            if keys is None or key in groups:
+                groups.setdefault(key, []).append(order)
+        
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.read_manifest() if keys is not None else {}
+        for key, segment_orders in groups.items():
+            if not segment_orders:
+                continue
+            with atomic_open(self.path(key)) as file:
+                for order in segment_orders:
+                    file.write(json.dumps(order.to_record()) + "\n")
+            manifest[key] = sales_partial(order_rows(segment_orders))
+        
+        # The manifest is written last, so its summaries never describe segments not yet on disk
+        with atomic_open(self.manifest_path) as file:
+            json.dump(dict(sorted(manifest.items())), file)
+        
+        # Drop files of segments that no longer have orders after a full rewrite
+        if keys is None:
+            for name in os.listdir(self.directory):
+                if name.startswith('orders-') and name[len('orders-'):-len('.jsonl')] not in manifest:
+                    os.remove(os.path.join(self.directory, name))
+
+    def scan(self, key, catalog, start, end):
+        """Compute sales totals for the orders of one segment placed on or after start and before end"""
+        rows = []
+        for record in iter_records(self.path(key)):
+            day = parse_time(record.get('created_at')).date()
+            if (start is None or day >= start) and (end is None or day < end):
+                items = [(item['product_id'], product.category, product.price, item['qty'])
+                         for item in record['items']
+                         for product in [catalog.get(item['product_id'])] if product]
+                rows.append((record['customer'], items))
+        return sales_partial(rows)
+
+    def sales(self, catalog, start=None, end=None):
+        """Return sales totals for orders placed from start to end, both dates inclusive.
+        
+        Segments outside the range are skipped, segments inside it are answered
+        from their summaries, and only segments that cross a boundary are read.
+        Orders without a time only count when the range is unbounded. The result
+        has the same form as report_engine.merge_sales, plus counts of how each
+        segment was handled.
+        """
+        end = end + timedelta(days=1) if end is not None else None
+        partials = []
+        handled = {'summarized': 0, 'scanned': 0, 'pruned': 0}
+        for key, summary in self.read_manifest().items():
+            if key == UNDATED:
+                covered = start is None and end is None
+                first = last = None
+            else:
+                first, last = segment_bounds(key)
+                covered = (start is None or first >= start) and (end is None or last <= end)
+            
+            if covered:
+                # JSON keys are strings, product ids are ints
+                summary['product_quantities'] = {int(product_id): quantity for product_id, quantity
+                                                 in summary['product_quantities'].items()}
+                partials.append(summary)
+                handled['summarized'] += 1
+            elif first is None or (start is not None and last <= start) or (end is not None and first >= end):
+                handled['pruned'] += 1
+            else:
+                partials.append(self.scan(key, catalog, start, end))
+                handled['scanned'] += 1
+        totals = merge_sales(partials)
+        totals['segments'] = handled
+        return totals
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+from main import ECommerceSystem
+from order import Order
+import common_path
+from common.metrics import metrics
+from sqlite_store import SQLiteStore
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+MAX_BODY = 1 << 20  # largest request body accepted, in bytes
+MAX_PAGE_SIZE = 1000
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def product_to_dict(product):
+    """Return the JSON form of a product"""
+    return {'id': product.id, 'name': product.name, 'category': product.category,
+            'price': product.price, 'stock': product.stock}
+
+def order_to_dict(order):
+    """Return the JSON form of an order with its total"""
+    record = order.to_record()
+    record['total'] = order.get_total()
+    return record
+
+def int_param(params, name, default, minimum=None, maximum=None):
+    """Read an integer query parameter, raising a 400 error if it is malformed or out of range"""
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a whole number")
+    if minimum is not None and maximum is not None and not minimum <= value <= maximum:
+        raise HTTPError(400, f"{name} must be between {minimum} and {maximum}")
+    if minimum is not None and value < minimum:
+        raise HTTPError(400, f"{name} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise HTTPError(400, f"{name} must be at most {maximum}")
+    return value
+
+def float_param(params, name):
+    """Read an optional number query parameter, raising a 400 error if it is malformed"""
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number")
+
+def date_param(params, name):
+    """Read an optional YYYY-MM-DD query parameter, raising a 400 error if it is malformed"""
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a date as YYYY-MM-DD")
+
+def page_of(items, page, page_size):
+    """Return one page of a list as a JSON-ready dict"""
+    start = (page - 1) * page_size
+    return {'page': page, 'page_size': page_size, 'total': len(items), 'items': items[start:start + page_size]}
+
+class OrderBatcher:
+    """Collect orders submitted at about the same time and place them together,
+    so a burst of orders costs one journal write and fsync instead of one each
+    """
+
+    def __init__(self, system, window=0.002, max_batch=256, on_commit=None):
+        self.system = system
+        self.window = window  # seconds to wait for more orders after the first one arrives
+        self.max_batch = max_batch
+        self.on_commit = on_commit  # called after a batch places at least one order
+        self.queue = None
+        self.task = None
+        self.batches = 0
+        self.orders = 0
+
+    def start(self):
+        """Start placing queued orders on the running event loop"""
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def submit(self, record):
+        """Queue a validated order record and return its order and whether it was placed once its batch is written"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    def place(self, records):
+        """Build orders from records and place them, returning (order, placed flag) pairs.
+        
+        Runs in a worker thread, since allocating ids and customers takes order_lock,
+        which process_orders holds across the journal fsync.
+        """
+        orders = []
+        for record in records:
+            order = Order(self.system.next_order_id(), self.system.get_customer(record['customer']))
+            for item in record['items']:
+                order.add_item(self.system.catalog.get(item['product_id']), item['qty'])
+            orders.append(order)
+        return list(zip(orders, self.system.process_orders(orders)))
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            records = [record for record, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.place, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.orders += len(batch)
+            if any(success for _, success in results) and self.on_commit:
+                self.on_commit()
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+class OrderService:
+    """JSON-over-HTTP front end for an ECommerceSystem, served from one asyncio event loop"""
+
+    def __init__(self, system, batch_window=0.002, max_batch=256, cache_size=128):
+        self.system = system
+        self.batcher = OrderBatcher(system, batch_window, max_batch, on_commit=self.invalidate)
+        self.version = 0  # bumped whenever orders change stock or sales
+        self.cache = OrderedDict()  # (report, parsed parameters) -> (version, response body), oldest first
+        self.cache_size = cache_size
+        self.cache_hits = 0
+
+    def invalidate(self):
+        """Drop cached reports after orders are placed"""
+        self.version += 1
+        self.cache.clear()
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    await self.respond(writer, 400, self.error_body("Malformed request"), False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, self.error_body("Request body too large"), False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                status, response_body = await self.dispatch(method, target, body)
+                await self.respond(writer, status, response_body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, keep_alive):
+        writer.write((f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                      f"Content-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    def error_body(self, message):
+        return json.dumps({'error': message}).encode()
+
+    async def dispatch(self, method, target, body):
+        """Route a request and return the status and JSON response body"""
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            if parts == ['products']:
+                self.require(method, 'GET')
+                return 200, self.encode(self.list_products(params))
+            if len(parts) == 2 and parts[0] == 'products':
+                self.require(method, 'GET')
+                return 200, self.encode(self.get_product(parts[1]))
+            if parts == ['orders'] and method == 'POST':
+                return await self.place_order(body)
+            if parts == ['orders']:
+                self.require(method, 'GET', 'POST')
+                return 200, self.encode(self.list_orders(params))
+            if len(parts) == 2 and parts[0] == 'reports' and parts[1] in ('sales', 'inventory'):
+                self.require(method, 'GET')
+                return 200, await self.cached_report(parts[1], params)
+            if parts == ['metrics']:
+                self.require(method, 'GET')
+                return 200, self.encode(self.get_metrics())
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+        except HTTPError as e:
+            return e.status, self.error_body(str(e))
+        except Exception as e:
+            print(f"Error handling {method} {target}: {e}")
+            return 500, self.error_body("Internal server error")
+
+    def require(self, method, *allowed):
+        if method not in allowed:
+            raise HTTPError(405, f"Use {' or '.join(allowed)}")
+
+    def encode(self, payload):
+        return json.dumps(payload).encode()
+
+    def list_products(self, params):
+        """Products by search query, price band or category, one page at a time"""
+        page = int_param(params, 'page', 1, 1)
+        page_size = int_param(params, 'page_size', 20, 1, MAX_PAGE_SIZE)
+        category = params.get('category') or None
+        min_price = float_param(params, 'min_price')
+        max_price = float_param(params, 'max_price')
+        if params.get('q'):
+            products = self.system.search_products(params['q'], page * page_size)
+        elif min_price is not None or max_price is not None:
+            # Only the requested page is taken from the price index
+            catalog = self.system.catalog
+            products = catalog.in_price_range(min_price, max_price, category, (page - 1) * page_size, page_size)
+            return {'page': page, 'page_size': page_size,
+                    'total': catalog.count_in_price_range(min_price, max_price, category),
+                    'items': [product_to_dict(product) for product in products]}
+        else:
+            products = self.system.products if category is None else self.system.catalog.in_category(category)
+        result = page_of(products, page, page_size)
+        result['items'] = [product_to_dict(product) for product in result['items']]
+        return result
+
+    def get_product(self, product_id):
+        product = self.system.catalog.get(int(product_id)) if product_id.isdigit() else None
+        if not product:
+            raise HTTPError(404, f"No product with ID {product_id}")
+        return product_to_dict(product)
+
+    def list_orders(self, params):
+        """All orders or one customer's orders, one page at a time"""
+        page = int_param(params, 'page', 1, 1)
+        page_size = int_param(params, 'page_size', 20, 1, MAX_PAGE_SIZE)
+        customer_name = params.get('customer')
+        orders = self.system.orders if not customer_name else self.system.get_customer_orders(customer_name)
+        result = page_of(orders, page, page_size)
+        result['items'] = [order_to_dict(order) for order in result['items']]
+        return result
+
+    async def place_order(self, body):
+        try:
+            record = json.loads(body or b'null')
+        except ValueError:
+            raise HTTPError(400, "Body must be a JSON object")
+        try:
+            error = self.system.validate_order_record(record)
+        except TypeError:
+            error = "Product IDs and quantities must be numbers"
+        if error:
+            raise HTTPError(400, error)
+
+        order, placed = await self.batcher.submit(record)
+        if not placed:
+            raise HTTPError(409, "Insufficient stock. Order not placed.")
+        return 201, self.encode(order_to_dict(order))
+
+    async def cached_report(self, name, params):
+        """Return a report body, reusing the last one for the same report and parameters until orders change"""
+        # Key on the parsed parameters, so reordered or unused query parameters share an entry
+        if name == 'sales':
+            key = (name, date_param(params, 'start'), date_param(params, 'end'))
+        else:
+            key = (name, int_param(params, 'threshold', None, 0))
+        cached = self.cache.get(key)
+        if cached and cached[0] == self.version:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached[1]
+
+        version = self.version
+        if name == 'sales':
+            report = await asyncio.to_thread(self.system.get_sales_report, False, key[1], key[2])
+        else:
+            report = await asyncio.to_thread(self.system.get_inventory_report, False, key[1])
+            report['low_stock'] = [product_to_dict(product) for product in report['low_stock']]
+        body = self.encode(report)
+        # A report computed while orders were being placed may already be out of date
+        if version == self.version:
+            self.cache[key] = (version, body)
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return body
+
+    def get_metrics(self):
+        return {'service': {'order_batches': self.batcher.batches, 'batched_orders': self.batcher.orders,
+                            'report_cache_hits': self.cache_hits},
+                'operations': metrics.snapshot()}
+
+async def serve(system, host='127.0.0.1', port=8080, batch_window=0.002, max_batch=256):
+    """Serve the system over HTTP until cancelled"""
+    service = OrderService(system, batch_window, max_batch)
+    service.batcher.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve products, orders and reports as JSON over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--batch-window', type=float, default=0.002,
+                        help="seconds to collect concurrent orders into one journal write")
+    parser.add_argument('--max-batch', type=int, default=256, help="most orders placed in one batch")
+    parser.add_argument('--flush-interval', type=float, default=30.0,
+                        help="seconds between rewrites of the monthly order segments that changed")
+    parser.add_argument('--compact-every', type=int, default=10000,
+                        help="journaled orders that trigger a full rewrite of the data files")
+    parser.add_argument('--database', help="SQLite database to serve instead of products.csv and orders.json")
+    parser.add_argument('--columnar', action='store_true',
+                        help="compute sales reports from NumPy columns instead of running totals")
+    parser.add_argument('--quiet', action='store_true', help="hide load and save messages")
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.database) if args.database else None
+    system = ECommerceSystem(columnar=args.columnar, flush_interval=args.flush_interval,
+                             compact_every=args.compact_every, store=store)
+    output = io.StringIO() if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        system.load_all()
+    try:
+        asyncio.run(serve(system, args.host, args.port, args.batch_window, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        system.close()
+
+if __name__ == "__main__":
+    main()
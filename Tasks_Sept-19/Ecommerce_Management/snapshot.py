@@ -0,0 +1,134 @@
+import math
+from array import array
+from datetime import datetime, timedelta
+import common_path
+from common.snapshot_file import StringTable, SnapshotFile, id_order, write_columns
+from product import Product
+from customer import Customer
+from order import Order
+
+MAGIC = b'ECSNAP01'
+EPOCH = datetime(1970, 1, 1)  # Order times are stored as seconds since this naive datetime
+
+def time_seconds(created_at):
+    """Return an order time as seconds since EPOCH, or NaN for orders without one"""
+    return (created_at - EPOCH).total_seconds() if created_at is not None else math.nan
+
+def seconds_time(seconds):
+    """Return the order time stored as seconds since EPOCH, or None for NaN"""
+    return EPOCH + timedelta(seconds=seconds) if not math.isnan(seconds) else None
+
+def write_snapshot(path, products, orders, generation=0):
+    """Write products and orders to a binary snapshot of the given data file generation"""
+    strings = StringTable()
+    columns = {
+        'products.id': array('q'), 'products.name': array('I'), 'products.category': array('I'),
+        'products.price': array('d'), 'products.stock': array('q'),
+        'orders.id': array('q'), 'orders.customer': array('I'), 'orders.created_at': array('d'),
+        'orders.item_start': array('Q', [0]),
+        'items.product_id': array('q'), 'items.qty': array('q')
+    }
+    for product in products:
+        columns['products.id'].append(product.id)
+        columns['products.name'].append(strings.add(product.name))
+        columns['products.category'].append(strings.add(product.category))
+        columns['products.price'].append(product.price)
+        columns['products.stock'].append(product.stock)
+    columns['products.by_id'] = id_order(columns['products.id'])
+    for order in orders:
+        columns['orders.id'].append(order.order_id)
+        columns['orders.customer'].append(strings.add(order.customer.name))
+        columns['orders.created_at'].append(time_seconds(order.created_at))
+        for product, quantity in order.items:
+            columns['items.product_id'].append(product.id)
+            columns['items.qty'].append(quantity)
+        columns['orders.item_start'].append(len(columns['items.product_id']))
+    columns['strings.offsets'], columns['strings.data'] = strings.columns()
+    write_columns(path, MAGIC, columns, {'products': len(columns['products.id']), 'orders': len(columns['orders.id'])},
+                  generation=generation)
+
+class Snapshot(SnapshotFile):
+    def __init__(self, path):
+        super().__init__(path, MAGIC)
+        self.generation = self.header.get('generation', 0)  # data file generation the snapshot was taken from
+        self.products = {}  # row -> materialised Product
+        self.customers = {}  # name -> materialised Customer
+
+    def product_count(self):
+        return self.counts['products']
+
+    def order_count(self):
+        return self.counts['orders']
+
+    def product(self, row):
+        """Materialise the product in a row"""
+        if row not in self.products:
+            self.products[row] = Product(
+                self.column('products.id')[row],
+                self.string(self.column('products.name')[row]),
+                self.string(self.column('products.category')[row]),
+                self.column('products.price')[row],
+                self.column('products.stock')[row]
+            )
+        return self.products[row]
+
+    def find_product(self, product_id):
+        """Materialise the product with the given id, or return None"""
+        row = self.find_row('products.id', 'products.by_id', product_id)
+        return self.product(row) if row is not None else None
+
+    def order(self, row, find_product=None):
+        """Materialise the order in a row, resolving products with find_product"""
+        find_product = find_product or self.find_product
+        name = self.string(self.column('orders.customer')[row])
+        if name not in self.customers:
+            self.customers[name] = Customer(name)
+        created_at = None
+        if 'orders.created_at' in self.layout:
+            created_at = seconds_time(self.column('orders.created_at')[row])
+        order = Order(self.column('orders.id')[row], self.customers[name], created_at)
+        item_start = self.column('orders.item_start')
+        product_ids = self.column('items.product_id')
+        quantities = self.column('items.qty')
+        for item in range(item_start[row], item_start[row + 1]):
+            product = find_product(product_ids[item])
+            if product:
+                order.add_item(product, quantities[item])
+        return order
+
+    def iter_products(self):
+        """Materialise every product in catalogue order"""
+        strings = self.all_strings()
+        rows = zip(self.column('products.id').tolist(), self.column('products.name').tolist(),
+                   self.column('products.category').tolist(), self.column('products.price').tolist(),
+                   self.column('products.stock').tolist())
+        for row, (product_id, name, category, price, stock) in enumerate(rows):
+            if row not in self.products:
+                self.products[row] = Product(product_id, strings[name], strings[category], price, stock)
+            yield self.products[row]
+
+    def iter_order_records(self):
+        """Yield every order in the same record form as orders.json"""
+        strings = self.all_strings()
+        ids = self.column('orders.id').tolist()
+        customers = self.column('orders.customer').tolist()
+        # Snapshots written before orders had times have no created_at column
+        if 'orders.created_at' in self.layout:
+            created = self.column('orders.created_at').tolist()
+        else:
+            created = [math.nan] * len(ids)
+        item_start = self.column('orders.item_start').tolist()
+        product_ids = self.column('items.product_id').tolist()
+        quantities = self.column('items.qty').tolist()
+        for row in range(len(ids)):
+            start, end = item_start[row], item_start[row + 1]
+            record = {
+                'order_id': ids[row],
+                'customer': strings[customers[row]],
+                'items': [{'product_id': product_id, 'qty': qty}
+                          for product_id, qty in zip(product_ids[start:end], quantities[start:end])]
+            }
+            created_at = seconds_time(created[row])
+            if created_at is not None:
+                record['created_at'] = created_at.isoformat()
+            yield record
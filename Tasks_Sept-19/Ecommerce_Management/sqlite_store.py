@@ -0,0 +1,316 @@
+import csv
+import sqlite3
+import threading
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+from product import Product
+from order import parse_time
+import common_path
+from common.streaming import iter_records
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    stock INTEGER NOT NULL CHECK (stock >= 0)
+);
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL REFERENCES customers(id),
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER NOT NULL REFERENCES orders(order_id),
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    qty INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_stock ON products(stock);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items(product_id);
+"""
+
+def format_time(created_at):
+    """Return an order time as ISO 8601 text, which sorts in time order, or None"""
+    return created_at.isoformat() if created_at is not None else None
+
+class SQLiteStore:
+    """Products, customers and orders in a SQLite database.
+
+    Pass one to ECommerceSystem(store=...) to load from and save to the database instead
+    of products.csv, orders.json and the order journal, with the reports run as SQL.
+    """
+
+    def __init__(self, path='store.db', batch_size=10000):
+        self.path = path
+        self.batch_size = batch_size  # rows per executemany during bulk loads
+        # Orders are saved from worker threads, so the connection is shared behind a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, safe with WAL
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        if 'created_at' not in {row[1] for row in self.conn.execute("PRAGMA table_info(orders)")}:
+            # Databases created before orders had times
+            self.conn.execute("ALTER TABLE orders ADD COLUMN created_at TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at)")
+
+    def import_products(self, path='products.csv'):
+        """Bulk load products from a CSV file, replacing existing rows with the same id"""
+        with open(path, 'r') as file, self.lock, self.conn:
+            rows = ((int(row['id']), row['name'], row['category'], float(row['price']), int(row['stock']))
+                    for row in csv.DictReader(file))
+            # An upsert, since REPLACE would delete rows that order items refer to
+            self.conn.executemany("""
+                INSERT INTO products (id, name, category, price, stock) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET name = excluded.name, category = excluded.category,
+                    price = excluded.price, stock = excluded.stock""", rows)
+
+    def import_orders(self, path='orders.json'):
+        """Bulk load orders from a JSON array or JSON Lines file in batches"""
+        records = iter_records(path)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            with self.lock, self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO customers (name) VALUES (?)",
+                                      ((record['customer'],) for record in batch))
+                customer_ids = self.customer_ids({record['customer'] for record in batch})
+                self.conn.executemany("DELETE FROM order_items WHERE order_id = ?",
+                                      ((record['order_id'],) for record in batch))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO orders (order_id, customer_id, created_at) VALUES (?, ?, ?)",
+                    ((record['order_id'], customer_ids[record['customer']],
+                      format_time(parse_time(record.get('created_at')))) for record in batch))
+                # Items for unknown products are skipped, as in load_orders
+                self.conn.executemany(
+                    "INSERT INTO order_items SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM products WHERE id = ?)",
+                    ((record['order_id'], item['product_id'], item['qty'], item['product_id'])
+                     for record in batch for item in record['items']))
+
+    def customer_ids(self, names):
+        """Return a dict of customer name -> id"""
+        ids = {}
+        names = list(names)
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for customer_id, name in self.conn.execute(
+                    f"SELECT id, name FROM customers WHERE name IN ({placeholders})", chunk):
+                ids[name] = customer_id
+        return ids
+
+    def stream(self, query, params=()):
+        """Yield the rows of a query, fetching batch_size rows at a time.
+
+        Reads use their own connection, so a long scan neither holds the lock that saving
+        orders takes nor sees orders saved after it started.
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(query, params)
+            for rows in iter(lambda: cursor.fetchmany(self.batch_size), []):
+                yield from rows
+        finally:
+            conn.close()
+
+    def iter_products(self):
+        """Yield every product in id order"""
+        for row in self.stream("SELECT id, name, category, price, stock FROM products ORDER BY id"):
+            yield Product(*row)
+
+    def iter_customer_names(self):
+        """Yield every customer name in the order customers were first seen"""
+        for (name,) in self.stream("SELECT name FROM customers ORDER BY id"):
+            yield name
+
+    def iter_order_records(self, customer=None, offset=0, limit=-1):
+        """Yield orders in id order, in the same record form as orders.json.
+
+        Only the given customer's orders are read if customer is set, and only limit of them
+        after skipping offset. A negative limit reads to the end.
+        """
+        conditions, params = [], []
+        if customer is not None:
+            conditions.append("o.customer_id = (SELECT id FROM customers WHERE name = ?)")
+            params.append(customer)
+        if offset or limit >= 0:
+            # Find the ids the page spans first, so the join below never has to be limited by row
+            with self.lock:
+                first, last = self.conn.execute(
+                    f"SELECT MIN(order_id), MAX(order_id) FROM (SELECT o.order_id FROM orders o "
+                    f"{'WHERE ' + conditions[0] if conditions else ''} ORDER BY o.order_id LIMIT ? OFFSET ?)",
+                    params + [limit, offset]).fetchone()
+            if first is None:
+                return
+            conditions.append("o.order_id BETWEEN ? AND ?")
+            params += [first, last]
+        # One row per item, walking the orders key and the items index in order, so SQLite never
+        # sorts or buffers the result and each order's rows come out together
+        rows = self.stream(f"""
+            SELECT o.order_id, c.name, o.created_at, i.product_id, i.qty
+            FROM orders o JOIN customers c ON c.id = o.customer_id
+            LEFT JOIN order_items i ON i.order_id = o.order_id
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY o.order_id""", params)
+        for (order_id, customer_name, created_at), items in groupby(rows, key=itemgetter(0, 1, 2)):
+            # An order without items has a single row of NULLs from the outer join
+            record = {'order_id': order_id, 'customer': customer_name,
+                      'items': [{'product_id': row[3], 'qty': row[4]} for row in items if row[3] is not None]}
+            if created_at is not None:
+                record['created_at'] = created_at
+            yield record
+
+    def count_orders(self, customer=None):
+        """Return the number of orders, or of one customer's orders"""
+        with self.lock:
+            if customer is None:
+                return self.conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM orders WHERE customer_id = "
+                                     "(SELECT id FROM customers WHERE name = ?)", (customer,)).fetchone()[0]
+
+    def max_order_id(self):
+        """Return the highest order id, or None if there are no orders"""
+        with self.lock:
+            return self.conn.execute("SELECT MAX(order_id) FROM orders").fetchone()[0]
+
+    def save_orders(self, orders):
+        """Save placed orders and take their stock in one transaction.
+
+        Raises ValueError and saves nothing if any product is short of stock in the
+        database, which means it was changed by something other than this system.
+        """
+        with self.lock, self.conn:
+            for order in orders:
+                for product, quantity in order.items:
+                    cursor = self.conn.execute(
+                        "UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?",
+                        (quantity, product.id, quantity))
+                    if cursor.rowcount != 1:
+                        raise ValueError(f"Insufficient stock in the database for product {product.id}")
+            names = {order.customer.name for order in orders}
+            self.conn.executemany("INSERT OR IGNORE INTO customers (name) VALUES (?)", ((name,) for name in names))
+            customer_ids = self.customer_ids(names)
+            self.conn.executemany("INSERT INTO orders (order_id, customer_id, created_at) VALUES (?, ?, ?)",
+                                  ((order.order_id, customer_ids[order.customer.name], format_time(order.created_at))
+                                   for order in orders))
+            self.conn.executemany("INSERT INTO order_items VALUES (?, ?, ?)",
+                                  ((order.order_id, product.id, quantity)
+                                   for order in orders for product, quantity in order.items))
+
+    def sales_totals(self, start=None, end=None):
+        """Return the order count, revenue, revenue by category and top customer with their spend,
+        over all orders or only those placed from start to end, both dates inclusive.
+        
+        Orders without a time only count when the range is unbounded, as with the order segments.
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("o.created_at >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            conditions.append("o.created_at < ?")
+            params.append((end + timedelta(days=1)).isoformat())
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            orders = self.conn.execute(f"SELECT COUNT(*) FROM orders o {where}", params).fetchone()[0]
+            category_revenue = dict(self.conn.execute(f"""
+                SELECT p.category, SUM(p.price * i.qty)
+                FROM orders o
+                JOIN order_items i ON i.order_id = o.order_id
+                JOIN products p ON p.id = i.product_id
+                {where}
+                GROUP BY p.category ORDER BY 2 DESC""", params))
+            # Ties go to the customer who ordered first, as with the running totals
+            top = self.conn.execute(f"""
+                SELECT c.name, SUM(p.price * i.qty) AS spend
+                FROM orders o
+                JOIN customers c ON c.id = o.customer_id
+                JOIN order_items i ON i.order_id = o.order_id
+                JOIN products p ON p.id = i.product_id
+                {where}
+                GROUP BY c.id ORDER BY spend DESC, MIN(o.order_id) LIMIT 1""", params).fetchone()
+        return {
+            'orders': orders,
+            'revenue': sum(category_revenue.values()),
+            'category_revenue': category_revenue,
+            'top_customer': top[0] if top else None,
+            'top_spend': top[1] if top else None
+        }
+
+    def most_ordered_product(self):
+        """Return the id and total quantity of the most ordered product"""
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT product_id, SUM(qty) AS total FROM order_items
+                GROUP BY product_id ORDER BY total DESC, MIN(rowid) LIMIT 1""").fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def low_stock(self, threshold=5):
+        """Return products with stock below the threshold, lowest stock first"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, name, category, price, stock FROM products "
+                                     "WHERE stock < ? ORDER BY stock, id", (threshold,)).fetchall()
+        return [Product(*row) for row in rows]
+
+    def average_prices(self):
+        """Return a dict of category -> average product price"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT category, AVG(price) FROM products GROUP BY category"))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class StoredOrders:
+    """The orders in a store, or one customer's, as a read-only sequence.
+
+    Only the orders asked for are read, so a page of a large order history costs one
+    small query. build turns an order record into an Order.
+    """
+
+    def __init__(self, store, build, customer=None):
+        self.store = store
+        self.build = build
+        self.customer = customer
+
+    def __len__(self):
+        return self.store.count_orders(self.customer)
+
+    def __iter__(self):
+        return map(self.build, self.store.iter_order_records(self.customer))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            records = self.store.iter_order_records(self.customer, start, max(0, stop - start))
+            return [self.build(record) for record in records][::step]
+        if index < 0:
+            index += len(self)
+        records = list(self.store.iter_order_records(self.customer, index, 1)) if index >= 0 else []
+        if not records:
+            raise IndexError("order index out of range")
+        return self.build(records[0])
+
+# Import products.csv and orders.json into the database and print the reports.
+# The reports run in SQL, so nothing needs loading into memory first.
+if __name__ == "__main__":
+    from main import ECommerceSystem
+    store = SQLiteStore()
+    store.import_products()
+    store.import_orders()
+    system = ECommerceSystem(store=store)
+    system.generate_sales_report()
+    system.generate_inventory_report()
+    system.close()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from customer import Customer
+from journal import OrderJournal
+from order import Order
+from product import Product
+
+class TornTailTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'orders.journal')
+        self.product = Product(1, 'Pen', 'Stationery', 10.0, 100)
+        self.customer = Customer('Asha')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def order(self, order_id):
+        order = Order(order_id, self.customer)
+        order.add_item(self.product, 1)
+        return order
+
+    def replayed_ids(self):
+        return [record['order_id'] for record in OrderJournal(self.path).replay()]
+
+    def test_append_after_torn_tail(self):
+        journal = OrderJournal(self.path)
+        journal.append_many([self.order(101), self.order(102)])
+        journal.close()
+        # A crash while writing order 102 leaves only part of its line
+        with open(self.path, 'r+') as file:
+            data = file.read()
+            file.seek(0)
+            file.truncate()
+            file.write(data[:-20])
+
+        journal = OrderJournal(self.path)
+        journal.append(self.order(103))
+        journal.append_many([self.order(104)])
+        journal.close()
+        self.assertEqual(self.replayed_ids(), [101, 103, 104])
+
+    def test_append_after_missing_newline(self):
+        journal = OrderJournal(self.path)
+        journal.append(self.order(101))
+        journal.close()
+        with open(self.path, 'r+') as file:
+            data = file.read()
+            file.seek(0)
+            file.truncate()
+            file.write(data.rstrip('\n'))
+
+        journal = OrderJournal(self.path)
+        journal.append(self.order(102))
+        journal.close()
+        self.assertEqual(self.replayed_ids(), [101, 102])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from main import ECommerceSystem
+from order import Order
+
+class SegmentCoverageTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        with open('products.csv', 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['id', 'name', 'category', 'price', 'stock'])
+            writer.writerow([1, 'Pen', 'Stationery', 10.0, 1000])
+        orders = [{'order_id': 100 + number, 'customer': f"Customer {number % 5}",
+                   'items': [{'product_id': 1, 'qty': 1}],
+                   'created_at': f"2025-{number % 12 + 1:02d}-15T10:00:00"} for number in range(1, 41)]
+        with open('orders.json', 'w') as file:
+            json.dump(orders, file)
+        self.system = self.load()
+
+    def tearDown(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system.close()
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def load(self):
+        system = ECommerceSystem(workers=1, flush_interval=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.load_products()
+            system.load_orders()
+        return system
+
+    def place_order(self):
+        order = Order(self.system.next_order_id(), self.system.get_customer("New Customer"))
+        order.add_item(self.system.catalog.get(1), 1)
+        self.assertTrue(self.system.process_order(order))
+
+    def test_keyed_write_before_first_report_keeps_history(self):
+        # The new order only marks the current month dirty
+        self.place_order()
+        self.system.writer.flush('segments')
+        totals = self.system.get_sales_between(date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual(totals['orders'], 40)
+
+    def test_partial_manifest_from_earlier_run_is_rewritten(self):
+        self.place_order()
+        self.system.writer.flush('segments')
+        with open(os.path.join('order_segments', 'manifest.json'), 'w') as file:
+            json.dump({}, file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system.close()
+        self.system = self.load()
+        totals = self.system.get_sales_between(date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual(totals['orders'], 40)
+        self.assertEqual(self.system.get_sales_between()['orders'], 41)
+
+if __name__ == '__main__':
+    unittest.main()
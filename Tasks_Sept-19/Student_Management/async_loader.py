@@ -0,0 +1,82 @@
+import asyncio
+import csv
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from student import Student
+from teacher import Teacher
+import common_path
+from common.streaming import iter_records
+from common.metrics import metrics
+
+def parse_students(path='students.json'):
+    """Read and parse students.json into columns, in a worker process.
+    
+    Marks are flattened into subject and mark columns, since lists of strings
+    and numbers pickle much faster than one dict per student.
+    """
+    columns = {'id': [], 'name': [], 'age': [], 'grade': [], 'mark_start': array('Q', [0]),
+               'subject': [], 'mark': []}
+    for record in iter_records(path):
+        columns['id'].append(record['id'])
+        columns['name'].append(record['name'])
+        columns['age'].append(record['age'])
+        columns['grade'].append(record['grade'])
+        columns['subject'].extend(record['marks'])
+        columns['mark'].extend(record['marks'].values())
+        columns['mark_start'].append(len(columns['subject']))
+    columns['bytes'] = os.path.getsize(path)
+    return columns
+
+def parse_teachers(path='teachers.csv'):
+    """Read and parse teachers.csv into (id, name, subject, salary) rows, in a worker process"""
+    with open(path, 'r') as file:
+        rows = [(int(row['id']), row['name'], row['subject'], float(row['salary']))
+                for row in csv.DictReader(file)]
+    return rows, os.path.getsize(path)
+
+def iter_students(columns):
+    """Build a Student for every row of student columns"""
+    mark_start = columns['mark_start'].tolist()
+    subjects = columns['subject']
+    marks = columns['mark']
+    rows = zip(columns['id'], columns['name'], columns['age'], columns['grade'])
+    for row, (student_id, name, age, grade) in enumerate(rows):
+        start, end = mark_start[row], mark_start[row + 1]
+        yield Student(student_id, name, age, grade, dict(zip(subjects[start:end], marks[start:end])))
+
+async def add_students(system, executor, path):
+    """Parse students in the executor, then add them to the system"""
+    try:
+        columns = await asyncio.get_running_loop().run_in_executor(executor, parse_students, path)
+        system.students.extend(iter_students(columns))
+        metrics.add(rows=len(columns['id']), bytes_read=columns['bytes'])
+        print("Students loaded successfully!")
+    except FileNotFoundError:
+        print("Students file not found.")
+    except Exception as e:
+        print(f"Error loading students: {e}")
+
+async def add_teachers(system, executor, path):
+    """Parse teachers in the executor, then add them to the system"""
+    try:
+        rows, size = await asyncio.get_running_loop().run_in_executor(executor, parse_teachers, path)
+        for row in rows:
+            teacher = Teacher(*row)
+            system.teachers.append(teacher)
+            system.index_teacher(teacher)
+        metrics.add(rows=len(rows), bytes_read=size)
+        print("Teachers loaded successfully!")
+    except FileNotFoundError:
+        print("Teachers file not found.")
+    except Exception as e:
+        print(f"Error loading teachers: {e}")
+
+async def load_concurrently(system, students_path='students.json', teachers_path='teachers.csv'):
+    """Load students and teachers into a SchoolManagementSystem with both files read and parsed at once.
+    
+    Whichever file finishes parsing first is added to the system first.
+    """
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        await asyncio.gather(add_students(system, executor, students_path),
+                             add_teachers(system, executor, teachers_path))
@@ -0,0 +1,148 @@
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from main import SchoolManagementSystem
+from student import Student
+from teacher import Teacher
+from snapshot import Snapshot
+from datagen import write_dataset
+import common_path
+from common.bench import working_directory, measure_bytes, time_call, print_results, save_results, compare_results
+
+# Person, Student and Teacher as they were before __slots__, for the memory suite
+class LegacyPerson:
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+class LegacyStudent(LegacyPerson):
+    def __init__(self, id, name, age, grade, marks):
+        super().__init__(name, age)
+        self.id = id
+        self.grade = grade
+        self.marks = marks
+
+class LegacyTeacher(LegacyPerson):
+    def __init__(self, id, name, subject, salary):
+        super().__init__(name, age=None)
+        self.id = id
+        self.subject = subject
+        self.salary = salary
+
+def bench_startup(num_students=200000, num_teachers=5000, lookups=100):
+    """Compare cold start from JSON/CSV with the binary snapshot"""
+    print(f"\n=== STARTUP ({num_students} students, {num_teachers} teachers) ===")
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, num_students, num_teachers)
+        with working_directory(directory):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                system = SchoolManagementSystem()
+                system.load_students()
+                system.load_teachers()
+                json_time = time.perf_counter() - start
+                system.save_snapshot()
+                
+                start = time.perf_counter()
+                SchoolManagementSystem().load_snapshot()
+                snapshot_time = time.perf_counter() - start
+            
+            # Lazy path: only the looked-up students are built into objects
+            start = time.perf_counter()
+            with Snapshot('school.snapshot') as snapshot:
+                for _ in range(lookups):
+                    snapshot.find_student(random.randint(1, num_students))
+            lazy_time = time.perf_counter() - start
+    print(f"JSON/CSV full load: {json_time:.3f}s")
+    print(f"Snapshot full load: {snapshot_time:.3f}s")
+    print(f"Snapshot open + {lookups} student lookups: {lazy_time:.4f}s")
+
+def bench_memory(count=100000):
+    """Compare bytes per Student and Teacher with the legacy dict-based versions"""
+    print(f"\n=== MEMORY PER OBJECT ({count} objects) ===")
+    marks = {'Math': 90, 'Science': 85, 'English': 88}
+    cases = [
+        ('Student', lambda i: LegacyStudent(i, f"Student {i}", 16, "10", marks),
+                    lambda i: Student(i, f"Student {i}", 16, "10", marks)),
+        ('Teacher', lambda i: LegacyTeacher(i, f"Teacher {i}", "Math", 50000.0),
+                    lambda i: Teacher(i, f"Teacher {i}", "Math", 50000.0)),
+    ]
+    for name, legacy_factory, factory in cases:
+        legacy_bytes = measure_bytes(legacy_factory, count)
+        new_bytes = measure_bytes(factory, count)
+        print(f"{name}: {legacy_bytes:.0f} -> {new_bytes:.0f} bytes ({new_bytes / legacy_bytes:.0%})")
+
+def loaded_system():
+    system = SchoolManagementSystem()
+    system.load_students()
+    system.load_teachers()
+    return system
+
+def bench_methods(num_students=100000, num_teachers=2000, subjects_per_student=8, exponent=1.1,
+                  repeat=3, seed=42):
+    """Time every loader, saver and report method of SchoolManagementSystem on a synthetic dataset"""
+    print(f"\n=== METHODS ({num_students} students, {num_teachers} teachers, "
+          f"{subjects_per_student} subjects each, best of {repeat}) ===")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        write_dataset(directory, num_students, num_teachers, subjects_per_student, exponent, seed)
+        with working_directory(directory):
+            # Loaders start from an empty system on every run
+            results['load_students'] = time_call(lambda: SchoolManagementSystem().load_students(), repeat)
+            results['load_teachers'] = time_call(lambda: SchoolManagementSystem().load_teachers(), repeat)
+            results['load_all'] = time_call(lambda: SchoolManagementSystem().load_all(), repeat)
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                system = loaded_system()
+            cases = [
+                ('save_students', system.save_students),
+                ('save_teachers', system.save_teachers),
+                ('save_snapshot', system.save_snapshot),
+                ('load_snapshot', lambda: SchoolManagementSystem().load_snapshot()),
+                ('print_all_students', system.print_all_students),
+                ('print_all_teachers', system.print_all_teachers),
+                ('find_student_topper', system.find_student_topper),
+                ('search_students', lambda: system.search_students("student 42")),
+                ('search_teachers', lambda: system.search_teachers("teacher 4")),
+                ('iter_class_ranks', lambda: sum(1 for _ in system.iter_class_ranks())),
+                ('get_average_teacher_salary', system.get_average_teacher_salary),
+                ('find_highest_paid_teacher', system.find_highest_paid_teacher),
+                ('generate_student_teacher_report', system.generate_student_teacher_report),
+                ('generate_summary_report', system.generate_summary_report),
+            ]
+            for name, function in cases:
+                results[name] = time_call(function, repeat)
+    
+    print_results(results, width=34)
+    scale = {'students': num_students, 'teachers': num_teachers,
+             'subjects_per_student': subjects_per_student, 'exponent': exponent, 'seed': seed}
+    return scale, results
+
+# Run the benchmarks
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SchoolManagementSystem on synthetic data")
+    parser.add_argument('--suite', choices=['methods', 'startup', 'memory', 'all'], default='all')
+    parser.add_argument('--students', type=int, default=100000, help="students for the methods suite")
+    parser.add_argument('--teachers', type=int, default=2000, help="teachers for the methods suite")
+    parser.add_argument('--subjects', type=int, default=8, help="average subjects per student")
+    parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent of subject popularity")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per method, the fastest is kept")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json', help="file to record method timings in")
+    parser.add_argument('--baseline', help="earlier results file to compare method timings with")
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    if args.suite in ('methods', 'all'):
+        scale, results = bench_methods(args.students, args.teachers, args.subjects, args.skew,
+                                       args.repeat, args.seed)
+        save_results(args.output, scale, results)
+        if args.baseline:
+            compare_results(args.baseline, scale, results, width=34)
+    if args.suite in ('startup', 'all'):
+        bench_startup()
+    if args.suite in ('memory', 'all'):
+        bench_memory()
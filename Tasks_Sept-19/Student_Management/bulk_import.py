@@ -0,0 +1,57 @@
+import argparse
+import contextlib
+import csv
+import io
+import sys
+import time
+from main import SchoolManagementSystem
+import common_path
+from common.streaming import iter_records, iter_file_records
+
+def read_records(path):
+    """Yield records from a CSV file, a JSON array or JSON Lines file, or stdin for -"""
+    if path == '-':
+        yield from iter_file_records(sys.stdin)
+    elif path.endswith('.csv'):
+        with open(path, 'r', newline='') as file:
+            yield from csv.DictReader(file)
+    else:
+        yield from iter_records(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import students or teachers without the interactive menu")
+    parser.add_argument('kind', choices=['students', 'teachers'])
+    parser.add_argument('file', help="CSV, JSON array or JSON Lines file, or - for JSON from stdin")
+    parser.add_argument('--batch-size', type=int, default=1000, help="records validated per batch")
+    parser.add_argument('--quiet', action='store_true', help="hide load and save messages")
+    args = parser.parse_args()
+
+    system = SchoolManagementSystem()
+    output = io.StringIO() if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(output):
+        system.load_students()
+        system.load_teachers()
+
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            if args.kind == 'students':
+                imported, errors = system.import_students(read_records(args.file), args.batch_size)
+            else:
+                imported, errors = system.import_teachers(read_records(args.file), args.batch_size)
+    except RuntimeError as e:
+        # Shown even with --quiet, which hides the write error itself
+        print(f"Import failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    for number, error in errors[:20]:
+        print(f"Record {number}: {error}")
+    if len(errors) > 20:
+        print(f"... and {len(errors) - 20} more errors")
+    total = imported + len(errors)
+    print(f"\nImported {imported} of {total} {args.kind} in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} records/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import contextlib
+import csv
+import sys
+import time
+from main import SchoolManagementSystem
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank every student within their grade without loading all students")
+    parser.add_argument('--students', default='students.json', help="JSON array or JSON Lines file of students")
+    parser.add_argument('--grade', help="only rank this grade")
+    parser.add_argument('--top', type=int, help="only output this many students per grade")
+    parser.add_argument('--memory-mb', type=float, default=64, help="memory budget for sorting, in megabytes")
+    parser.add_argument('--output', help="CSV file to write, default is standard output")
+    args = parser.parse_args()
+
+    system = SchoolManagementSystem()
+    start = time.perf_counter()
+    rows = system.iter_class_ranks(args.grade, args.students, int(args.memory_mb * 1024 * 1024))
+    with open(args.output, 'w', newline='') if args.output else contextlib.nullcontext(sys.stdout) as file:
+        writer = csv.writer(file)
+        writer.writerow(['grade', 'rank', 'id', 'name', 'average'])
+        count = 0
+        for grade, rank, student_id, name, average in rows:
+            # Ranks restart for every grade, so skip rows past --top instead of stopping at the first one
+            if args.top is not None and rank > args.top:
+                continue
+            writer.writerow([grade, rank, student_id, name, f"{average:.2f}"])
+            count += 1
+    print(f"Wrote {count} students in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
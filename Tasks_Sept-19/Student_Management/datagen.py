@@ -0,0 +1,51 @@
+import csv
+import json
+import os
+import random
+import common_path
+from common.sampling import ZipfSampler
+
+SUBJECTS = ['Math', 'English', 'Science', 'Physics', 'Chemistry', 'Biology', 'History', 'Geography',
+            'Computer Science', 'Economics', 'Hindi', 'Art', 'Music', 'Physical Education',
+            'Accountancy', 'Business Studies', 'Political Science', 'Psychology', 'Sociology', 'French']
+
+def generate_students(num_students, subjects_per_student=8, exponent=1.1, rng=None):
+    """Yield student records where popular subjects are taken by most students"""
+    rng = rng or random
+    subjects = ZipfSampler(len(SUBJECTS), exponent, rng)
+    subjects_per_student = min(subjects_per_student, len(SUBJECTS))
+    for student_id in range(1, num_students + 1):
+        # Each student takes around subjects_per_student subjects, never fewer than one
+        count = max(1, min(len(SUBJECTS), subjects_per_student + rng.randint(-2, 2)))
+        marks = {}
+        while len(marks) < count:
+            mark = min(100, max(0, round(rng.gauss(70, 15))))
+            marks.setdefault(SUBJECTS[subjects.sample()], mark)
+        yield {
+            'id': student_id,
+            'name': f"Student {student_id}",
+            'age': rng.randint(14, 18),
+            'grade': str(rng.randint(9, 12)),
+            'marks': marks
+        }
+
+def generate_teachers(num_teachers, exponent=1.1, rng=None):
+    """Yield teacher rows as [id, name, subject, salary], with more teachers for popular subjects"""
+    rng = rng or random
+    subjects = ZipfSampler(len(SUBJECTS), exponent, rng)
+    for teacher_id in range(1, num_teachers + 1):
+        yield [teacher_id, f"Teacher {teacher_id}", SUBJECTS[subjects.sample()], rng.randint(30000, 90000)]
+
+def write_dataset(directory, num_students, num_teachers, subjects_per_student=8, exponent=1.1, seed=42):
+    """Write a synthetic students.json and teachers.csv into a directory"""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, 'students.json'), 'w') as file:
+        file.write('[\n')
+        for index, student in enumerate(generate_students(num_students, subjects_per_student, exponent, rng)):
+            file.write((',\n' if index else '') + json.dumps(student))
+        file.write('\n]')
+
+    with open(os.path.join(directory, 'teachers.csv'), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'name', 'subject', 'salary'])
+        writer.writerows(generate_teachers(num_teachers, exponent, rng))
@@ -1,34 +1,74 @@
+import asyncio
 import json
 import csv
 import os
+import sys
+from operator import itemgetter
 from student import Student
 from teacher import Teacher
+import common_path
+from common.streaming import iter_records, iter_batches, validated_batches
+from common.metrics import metrics
+from common.rendering import render, browse, write_lines
+from common.search_index import SearchIndex
+from common.external_sort import external_sort, ranked
+from common.write_behind import WriteBehind, atomic_open
+from report_engine import compute_summary
+from ranking import StudentRanking
+from snapshot import Snapshot, write_snapshot
+from async_loader import load_concurrently
+
+try:
+    from marks_matrix import MarksMatrix
+except ImportError:
+    MarksMatrix = None  # NumPy not installed
 
 class SchoolManagementSystem:
-    def __init__(self):
+    def __init__(self, workers=None, flush_interval=2.0, flush_every=1000):
         self.students = []
         self.teachers = []
+        self.teachers_by_subject = {}  # case-folded subject -> teachers of that subject
+        self.workers = workers  # Processes for report generation, None uses every core
+        self.ranking = None  # Students ranked by average, built on first use
+        self.students_by_grade = None  # grade -> students in that grade, built on first use
+        self.marks_matrix = None  # Students x subjects marks for vectorized statistics
+        # Name tokens -> positions in self.students / self.teachers, caught up as records are added
+        self.student_search = SearchIndex()
+        self.teacher_search = SearchIndex()
+        # Changes are written to file in the background instead of on every edit
+        self.writer = WriteBehind(interval=flush_interval, max_dirty=flush_every)
+        self.writer.register('students', self.write_students)
+        self.writer.register('teachers', self.write_teachers)
     
-    def load_students(self):
-        """Load students from JSON file"""
+    @metrics.timed()
+    def load_students(self, on_batch=None, batch_size=1000):
+        """Load students from JSON file, passing each batch of students to on_batch if given"""
         try:
-            with open('students.json', 'r') as file:
-                students_data = json.load(file)
-                for student_data in students_data:
-                    student = Student(
-                        student_data['id'],
-                        student_data['name'],
-                        student_data['age'],
-                        student_data['grade'],
-                        student_data['marks']
-                    )
-                    self.students.append(student)
+            for batch in iter_batches(self.stream_students(), batch_size):
+                metrics.add(rows=len(batch))
+                if on_batch:
+                    on_batch(batch)
+            metrics.add(bytes_read=os.path.getsize('students.json'))
             print("Students loaded successfully!")
         except FileNotFoundError:
             print("Students file not found.")
         except Exception as e:
             print(f"Error loading students: {e}")
     
+    def stream_students(self, path='students.json'):
+        """Load students one record at a time from a JSON array or JSON Lines file, yielding each student"""
+        for student_data in iter_records(path):
+            student = Student(
+                student_data['id'],
+                student_data['name'],
+                student_data['age'],
+                student_data['grade'],
+                student_data['marks']
+            )
+            self.students.append(student)
+            yield student
+    
+    @metrics.timed()
     def load_teachers(self):
         """Load teachers from CSV file"""
         try:
@@ -42,61 +82,224 @@ class SchoolManagementSystem:
                         float(row['salary'])
                     )
                     self.teachers.append(teacher)
+                    self.index_teacher(teacher)
+            metrics.add(rows=len(self.teachers), bytes_read=os.path.getsize('teachers.csv'))
             print("Teachers loaded successfully!")
         except FileNotFoundError:
             print("Teachers file not found.")
         except Exception as e:
             print(f"Error loading teachers: {e}")
     
+    @metrics.timed()
+    def load_all(self):
+        """Load students and teachers concurrently, or one after the other on a single core"""
+        workers = self.workers or os.cpu_count() or 1
+        loaded = False
+        if workers > 1:
+            try:
+                asyncio.run(load_concurrently(self))
+                loaded = True
+            except (OSError, NotImplementedError) as e:
+                print(f"Concurrent loading unavailable ({e}). Loading sequentially.")
+        if not loaded:
+            self.load_students()
+            self.load_teachers()
+        self.get_marks_matrix()
+        self.index_names()
+    
+    def index_teacher(self, teacher):
+        """Add a teacher to the subject index"""
+        self.teachers_by_subject.setdefault(teacher.subject.casefold(), []).append(teacher)
+    
     def save_students(self):
         """Save students to JSON file"""
         try:
-            students_data = []
-            for student in self.students:
-                student_data = {
-                    'id': student.id,
-                    'name': student.name,
-                    'age': student.age,
-                    'grade': student.grade,
-                    'marks': student.marks
-                }
-                students_data.append(student_data)
-            
-            with open('students.json', 'w') as file:
-                json.dump(students_data, file, indent=2)
+            self.write_students()
             print("Students saved successfully!")
+            return True
         except Exception as e:
             print(f"Error saving students: {e}")
+            return False
+    
+    @metrics.timed()
+    def write_students(self):
+        """Atomically write students to JSON file, raising if the write fails"""
+        students_data = []
+        for student in self.students:
+            student_data = {
+                'id': student.id,
+                'name': student.name,
+                'age': student.age,
+                'grade': student.grade,
+                'marks': student.marks
+            }
+            students_data.append(student_data)
+        
+        with atomic_open('students.json') as file:
+            json.dump(students_data, file, indent=2)
+        metrics.add(rows=len(self.students), bytes_written=os.path.getsize('students.json'))
     
     def save_teachers(self):
         """Save teachers to CSV file"""
         try:
-            with open('teachers.csv', 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(['id', 'name', 'subject', 'salary'])
-                for teacher in self.teachers:
-                    writer.writerow([teacher.id, teacher.name, teacher.subject, teacher.salary])
+            self.write_teachers()
             print("Teachers saved successfully!")
+            return True
         except Exception as e:
             print(f"Error saving teachers: {e}")
+            return False
     
-    def print_all_students(self):
-        """Print all students with their details and average marks"""
-        print("\n=== ALL STUDENTS ===")
-        for student in self.students:
-            print(f"{student}")
+    @metrics.timed()
+    def write_teachers(self):
+        """Atomically write teachers to CSV file, raising if the write fails"""
+        with atomic_open('teachers.csv', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['id', 'name', 'subject', 'salary'])
+            for teacher in self.teachers:
+                writer.writerow([teacher.id, teacher.name, teacher.subject, teacher.salary])
+        metrics.add(rows=len(self.teachers), bytes_written=os.path.getsize('teachers.csv'))
     
-    def print_all_teachers(self):
-        """Print all teachers with their details"""
-        print("\n=== ALL TEACHERS ===")
-        for teacher in self.teachers:
-            print(teacher.get_details())
+    @metrics.timed()
+    def save_snapshot(self, path='school.snapshot'):
+        """Save students and teachers to a binary snapshot"""
+        try:
+            write_snapshot(path, self.students, self.teachers)
+            metrics.add(rows=len(self.students) + len(self.teachers), bytes_written=os.path.getsize(path))
+            print("Snapshot saved successfully!")
+            return True
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+            return False
     
+    @metrics.timed()
+    def load_snapshot(self, path='school.snapshot'):
+        """Load students and teachers from a binary snapshot instead of students.json and teachers.csv"""
+        try:
+            with Snapshot(path) as snapshot:
+                self.students.extend(snapshot.iter_students())
+                for teacher in snapshot.iter_teachers():
+                    self.teachers.append(teacher)
+                    self.index_teacher(teacher)
+                metrics.add(rows=snapshot.student_count() + snapshot.teacher_count(),
+                            bytes_read=os.path.getsize(path))
+            print("Snapshot loaded successfully!")
+        except FileNotFoundError:
+            print("Snapshot file not found.")
+        except Exception as e:
+            print(f"Error loading snapshot: {e}")
+    
+    @metrics.timed()
+    def print_all_students(self, grade=None, page=None, page_size=20, output=None):
+        """Print all students with their details and average marks, or one page of them,
+        optionally only those in a grade. Returns the number of pages.
+        """
+        students = self.students if grade is None else self.get_students_by_grade().get(grade, [])
+        metrics.add(rows=len(students) if page is None else min(page_size, len(students)))
+        return render("ALL STUDENTS", students, str, page, page_size, output)
+    
+    @metrics.timed()
+    def print_all_teachers(self, subject=None, page=None, page_size=20, output=None):
+        """Print all teachers with their details, or one page of them, optionally only those of a subject.
+        
+        Returns the number of pages.
+        """
+        teachers = self.teachers if subject is None else self.teachers_by_subject.get(subject.casefold(), [])
+        metrics.add(rows=len(teachers) if page is None else min(page_size, len(teachers)))
+        return render("ALL TEACHERS", teachers, Teacher.get_details, page, page_size, output)
+    
+    def get_students_by_grade(self):
+        """Return a dict of grade -> students, rebuilding it after students are added"""
+        if self.students_by_grade is None or sum(map(len, self.students_by_grade.values())) != len(self.students):
+            self.students_by_grade = {}
+            for student in self.students:
+                self.students_by_grade.setdefault(student.grade, []).append(student)
+        return self.students_by_grade
+    
+    def get_ranking(self):
+        """Return the students ranked by average marks, rebuilding it after bulk loads"""
+        if self.ranking is None or len(self.ranking) != len(self.students):
+            self.ranking = StudentRanking(self.students)
+        return self.ranking
+    
+    def set_student_mark(self, student, subject, mark):
+        """Change one mark of a student and move the student to its new rank"""
+        student.set_mark(subject, mark)
+        if self.ranking is not None and len(self.ranking) == len(self.students):
+            self.ranking.update(student)
+        if self.marks_matrix is not None and not self.marks_matrix.set_mark(student, subject, mark):
+            self.marks_matrix = None
+        self.writer.mark_dirty('students', student.id)
+    
+    def get_marks_matrix(self):
+        """Return the marks matrix, rebuilding it after students are added, or None without NumPy"""
+        if MarksMatrix is None:
+            return None
+        if self.marks_matrix is None or len(self.marks_matrix) != len(self.students):
+            self.marks_matrix = MarksMatrix(self.students)
+        return self.marks_matrix
+    
+    def index_names(self):
+        """Add students and teachers appended since the last call to the name search indexes"""
+        for position in range(len(self.student_search), len(self.students)):
+            self.student_search.add(position, self.students[position].name)
+        for position in range(len(self.teacher_search), len(self.teachers)):
+            teacher = self.teachers[position]
+            self.teacher_search.add(position, teacher.name, teacher.subject)
+    
+    @metrics.timed()
+    def search_students(self, query, limit=20):
+        """Return up to limit students matching the query by name, best match first"""
+        self.index_names()
+        return [self.students[position] for position in self.student_search.search(query, limit)]
+    
+    @metrics.timed()
+    def search_teachers(self, query, limit=20):
+        """Return up to limit teachers matching the query by name or subject, best match first"""
+        self.index_names()
+        return [self.teachers[position] for position in self.teacher_search.search(query, limit)]
+    
+    def search_menu(self):
+        """Search students and teachers by name"""
+        query = input("Search for: ").strip()
+        if not query:
+            return
+        
+        students = self.search_students(query, 10)
+        print("\n=== MATCHING STUDENTS ===")
+        write_lines([str(student) for student in students] or ["No students found."])
+        
+        teachers = self.search_teachers(query, 10)
+        print("\n=== MATCHING TEACHERS ===")
+        write_lines([teacher.get_details() for teacher in teachers] or ["No teachers found."])
+    
+    def iter_class_ranks(self, grade=None, path=None, memory_limit=64 * 1024 * 1024):
+        """Yield (grade, rank, student id, name, average) for every student, by grade and best average first.
+        
+        Students come from a students file when path is given, so more students than fit in memory can be
+        ranked with an external sort within about memory_limit bytes. Equal averages share a rank.
+        """
+        def rows():
+            if path is None:
+                for student in self.students:
+                    yield student.grade, -student.get_average(), student.id, student.name
+            else:
+                for record in iter_records(path):
+                    marks = record['marks']
+                    average = sum(marks.values()) / len(marks) if marks else 0
+                    yield record['grade'], -average, record['id'], record['name']
+        
+        selected = rows() if grade is None else (row for row in rows() if row[0] == grade)
+        sorted_rows = external_sort(selected, memory_limit=memory_limit)
+        for rank, (student_grade, negative_average, student_id, name) in ranked(sorted_rows, score=itemgetter(1),
+                                                                               group=itemgetter(0)):
+            yield student_grade, rank, student_id, name, -negative_average
+    
+    @metrics.timed()
     def find_student_topper(self):
         """Find and return the student with the highest average marks"""
         if not self.students:
             return None
-        return max(self.students, key=lambda s: s.get_average())
+        return self.get_ranking().top(1)[0]
     
     def add_new_student(self):
         """Add a new student to the system"""
@@ -122,9 +325,11 @@ class SchoolManagementSystem:
             # Create and add student
             new_student = Student(student_id, name, age, grade, marks)
             self.students.append(new_student)
+            if self.ranking is not None and len(self.ranking) == len(self.students) - 1:
+                self.ranking.add(new_student)
             
-            # Save to file
-            self.save_students()
+            # Written to file by the next background flush
+            self.writer.mark_dirty('students', student_id)
             print(f"Student {name} added successfully!")
             
         except ValueError:
@@ -146,9 +351,10 @@ class SchoolManagementSystem:
             # Create and add teacher
             new_teacher = Teacher(teacher_id, name, subject, salary)
             self.teachers.append(new_teacher)
+            self.index_teacher(new_teacher)
             
-            # Save to file
-            self.save_teachers()
+            # Written to file by the next background flush
+            self.writer.mark_dirty('teachers', teacher_id)
             print(f"Teacher {name} added successfully!")
             
         except ValueError:
@@ -156,6 +362,95 @@ class SchoolManagementSystem:
         except Exception as e:
             print(f"Error adding teacher: {e}")
     
+    def validate_student_record(self, record):
+        """Return an error message for an invalid student record, or None"""
+        if not isinstance(record, dict):
+            return "Record is not an object"
+        if not isinstance(record.get('name'), str) or not record['name'].strip():
+            return "Missing student name"
+        try:
+            int(record.get('age'))
+        except (TypeError, ValueError):
+            return f"Invalid age: {record.get('age')}"
+        if record.get('grade') in (None, ''):
+            return "Missing grade"
+        marks = record.get('marks', {})
+        if not isinstance(marks, dict):
+            return "Marks must map subjects to numbers"
+        for subject, mark in marks.items():
+            if isinstance(mark, bool) or not isinstance(mark, (int, float)):
+                return f"Invalid mark for {subject}: {mark}"
+        return None
+    
+    def validate_teacher_record(self, record):
+        """Return an error message for an invalid teacher record, or None"""
+        if not isinstance(record, dict):
+            return "Record is not an object"
+        if not isinstance(record.get('name'), str) or not record['name'].strip():
+            return "Missing teacher name"
+        if not isinstance(record.get('subject'), str) or not record['subject'].strip():
+            return "Missing subject"
+        try:
+            float(record.get('salary'))
+        except (TypeError, ValueError):
+            return f"Invalid salary: {record.get('salary')}"
+        return None
+    
+    def import_records(self, records, validate, build, batch_size):
+        """Validate records a batch at a time and add the valid ones with build"""
+        imported = 0
+        errors = []
+        for batch in validated_batches(records, validate, errors, batch_size):
+            for _, record in batch:
+                build(record)
+                imported += 1
+        return imported, errors
+    
+    @metrics.timed()
+    def import_students(self, records, batch_size=1000):
+        """Validate and add students in batches without prompting, saving once at the end.
+        
+        Returns the number of students added and a list of (record number, error) pairs.
+        Raises RuntimeError if the students could not be saved.
+        """
+        next_id = max([s.id for s in self.students], default=0) + 1
+        
+        def build(record):
+            nonlocal next_id
+            self.students.append(Student(next_id, record['name'], int(record['age']),
+                                         str(record['grade']), dict(record.get('marks', {}))))
+            next_id += 1
+        
+        imported, errors = self.import_records(records, self.validate_student_record, build, batch_size)
+        if imported:
+            self.writer.mark_dirty('students')
+            if not self.writer.flush():
+                raise RuntimeError(f"{imported} students were imported but could not be saved")
+        return imported, errors
+    
+    @metrics.timed()
+    def import_teachers(self, records, batch_size=1000):
+        """Validate and add teachers in batches without prompting, saving once at the end.
+        
+        Returns the number of teachers added and a list of (record number, error) pairs.
+        Raises RuntimeError if the teachers could not be saved.
+        """
+        next_id = max([t.id for t in self.teachers], default=0) + 1
+        
+        def build(record):
+            nonlocal next_id
+            teacher = Teacher(next_id, record['name'], record['subject'], float(record['salary']))
+            self.teachers.append(teacher)
+            self.index_teacher(teacher)
+            next_id += 1
+        
+        imported, errors = self.import_records(records, self.validate_teacher_record, build, batch_size)
+        if imported:
+            self.writer.mark_dirty('teachers')
+            if not self.writer.flush():
+                raise RuntimeError(f"{imported} teachers were imported but could not be saved")
+        return imported, errors
+    
     def get_average_teacher_salary(self):
         """Calculate and return the average salary of all teachers"""
         if not self.teachers:
@@ -168,19 +463,22 @@ class SchoolManagementSystem:
             return None
         return max(self.teachers, key=lambda t: t.salary)
     
-    def generate_student_teacher_report(self):
-        """Generate report showing each student's name and their class teacher"""
-        print("\n=== STUDENT-TEACHER REPORT ===")
+    @metrics.timed()
+    def generate_student_teacher_report(self, output=None, chunk_size=10000):
+        """Generate report showing each student's name and their class teacher, written to output in chunks"""
+        output = output or sys.stdout
+        output.write("\n=== STUDENT-TEACHER REPORT ===\n")
         
         if not self.students or not self.teachers:
-            print("No data available for report.")
+            output.write("No data available for report.\n")
             return
         
+        lines = []
         for student in self.students:
             highest_subject = student.get_highest_subject()
             if highest_subject:
                 # Find teacher for this subject
-                subject_teachers = [t for t in self.teachers if t.subject.lower() == highest_subject.lower()]
+                subject_teachers = self.teachers_by_subject.get(highest_subject.casefold())
                 if subject_teachers:
                     teacher_name = subject_teachers[0].name
                 else:
@@ -188,50 +486,56 @@ class SchoolManagementSystem:
             else:
                 teacher_name = "No subjects found"
             
-            print(f"{student.name} (Highest Subject: {highest_subject}) - Class Teacher: {teacher_name}")
+            lines.append(f"{student.name} (Highest Subject: {highest_subject}) - Class Teacher: {teacher_name}")
+            if len(lines) >= chunk_size:
+                output.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            output.write("\n".join(lines) + "\n")
     
+    @metrics.timed()
     def generate_summary_report(self):
         """Generate summary report with various statistics"""
         print("\n=== SUMMARY REPORT ===")
         
-        # Total number of students per grade
-        grade_counts = {}
-        for student in self.students:
-            if student.grade in grade_counts:
-                grade_counts[student.grade] += 1
-            else:
-                grade_counts[student.grade] = 1
+        # Students per grade and subject averages from the marks matrix,
+        # or sharded across worker processes without NumPy
+        matrix = self.get_marks_matrix()
+        if matrix is not None:
+            summary = matrix.summary()
+        else:
+            summary = compute_summary(self.students, self.workers)
         
         print("\nStudents per Grade:")
-        for grade, count in grade_counts.items():
+        for grade, count in summary['grade_counts'].items():
             print(f"Grade {grade}: {count} students")
         
         # Average marks in each subject across all students
-        subject_marks = {}
-        subject_counts = {}
-        for student in self.students:
-            for subject, mark in student.marks.items():
-                if subject in subject_marks:
-                    subject_marks[subject] += mark
-                    subject_counts[subject] += 1
-                else:
-                    subject_marks[subject] = mark
-                    subject_counts[subject] = 1
-        
         print("\nAverage Marks per Subject:")
-        for subject, total_marks in subject_marks.items():
-            avg_marks = total_marks / subject_counts[subject]
+        for subject, avg_marks in summary['subject_averages'].items():
             print(f"{subject}: {avg_marks:.2f}")
         
+        if matrix is not None:
+            print("\nSubject Statistics:")
+            print(f"{'Subject':<20}{'Count':>8}{'Mean':>8}{'Median':>8}{'Std':>8}{'P10':>8}{'P90':>8}")
+            for subject, stats in matrix.subject_stats().items():
+                print(f"{subject:<20}{stats['count']:>8}{stats['mean']:>8.2f}{stats['median']:>8.2f}"
+                      f"{stats['std']:>8.2f}{stats['p10']:>8.2f}{stats['p90']:>8.2f}")
+            
+            print("\nAverage Marks per Grade:")
+            for grade, avg_marks in matrix.grade_averages().items():
+                print(f"Grade {grade}: {avg_marks:.2f}")
+        
         # Total salary spent on teachers
         total_salary = sum(t.salary for t in self.teachers)
         print(f"\nTotal Salary Spent on Teachers: ₹{total_salary:.2f}")
     
     def run_menu(self):
         """Run the main menu interface"""
+        profile_path = metrics.start_from_environment()
+        
         # Load data
-        self.load_students()
-        self.load_teachers()
+        self.load_all()
         
         while True:
             print("\n=== SCHOOL MANAGEMENT SYSTEM ===")
@@ -242,15 +546,19 @@ class SchoolManagementSystem:
             print("5. Generate Student-Teacher Report")
             print("6. Generate Summary Report")
             print("7. Show Statistics")
-            print("8. Exit")
+            print("8. Show Metrics")
+            print("9. Search")
+            print("10. Exit")
             
-            choice = input("Enter your choice (1-8): ")
+            choice = input("Enter your choice (1-10): ")
             
             if choice == '1':
-                self.print_all_students()
+                grade = input("Grade (leave blank for all): ").strip() or None
+                browse(lambda page: self.print_all_students(grade, page))
             
             elif choice == '2':
-                self.print_all_teachers()
+                subject = input("Subject (leave blank for all): ").strip() or None
+                browse(lambda page: self.print_all_teachers(subject, page))
             
             elif choice == '3':
                 self.add_new_student()
@@ -271,6 +579,8 @@ class SchoolManagementSystem:
                 topper = self.find_student_topper()
                 if topper:
                     print(f"Top Student: {topper.name} (Average: {topper.get_average():.2f})")
+                    for grade, student in sorted(self.get_ranking().toppers().items()):
+                        print(f"  Grade {grade} Topper: {student.name} (Average: {student.get_average():.2f})")
                 
                 # Highest paid teacher
                 highest_paid = self.find_highest_paid_teacher()
@@ -286,6 +596,15 @@ class SchoolManagementSystem:
                 print(f"Total Teachers: {len(self.teachers)}")
             
             elif choice == '8':
+                metrics.show()
+            
+            elif choice == '9':
+                self.search_menu()
+            
+            elif choice == '10':
+                self.writer.close()
+                if profile_path:
+                    print(metrics.stop_profiling(profile_path))
                 print("Thank you for using the School Management System!")
                 break
             
@@ -295,4 +614,4 @@ class SchoolManagementSystem:
 # Run the program
 if __name__ == "__main__":
     system = SchoolManagementSystem()
-    system.run_menu()
\ No newline at end of file
+    system.run_menu()
\ No newline at end of file
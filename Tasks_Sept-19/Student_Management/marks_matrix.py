@@ -0,0 +1,112 @@
+import warnings
+from itertools import chain
+import numpy as np
+
+class MarksMatrix:
+    def __init__(self, students):
+        """Build a students x subjects matrix of marks, with NaN and a False mask entry where a mark is missing"""
+        self.students = list(students)
+        self.rows = {student: row for row, student in enumerate(self.students)}
+        self.subjects = []
+        self.subject_index = {}  # subject -> column
+        self.grades = []
+        self.grade_index = {}  # grade -> code
+        
+        # Columns and grade codes in first-seen order, like the dict-based summary
+        for student in self.students:
+            for subject in student.marks:
+                if subject not in self.subject_index:
+                    self.subject_index[subject] = len(self.subjects)
+                    self.subjects.append(subject)
+            if student.grade not in self.grade_index:
+                self.grade_index[student.grade] = len(self.grades)
+                self.grades.append(student.grade)
+        
+        counts = np.fromiter((len(student.marks) for student in self.students), dtype=np.int64,
+                             count=len(self.students))
+        rows = np.repeat(np.arange(len(self.students)), counts)
+        columns = np.fromiter((self.subject_index[subject] for student in self.students for subject in student.marks),
+                              dtype=np.int64, count=len(rows))
+        values = np.fromiter(chain.from_iterable(student.marks.values() for student in self.students),
+                             dtype=np.float64, count=len(rows))
+        self.marks = np.full((len(self.students), len(self.subjects)), np.nan)
+        self.marks[rows, columns] = values
+        self.present = ~np.isnan(self.marks)
+        
+        # Grade codes, plus a row order that makes every grade a contiguous block
+        self.grade_codes = np.fromiter((self.grade_index[student.grade] for student in self.students),
+                                       dtype=np.int32, count=len(self.students))
+        self.grade_order = np.argsort(self.grade_codes, kind='stable')
+        self.grade_bounds = np.concatenate(([0], np.cumsum(np.bincount(self.grade_codes, minlength=len(self.grades)))))
+    
+    def set_mark(self, student, subject, mark):
+        """Update one mark in place. Returns False if the subject is new and the matrix must be rebuilt"""
+        if subject not in self.subject_index or student not in self.rows:
+            return False
+        row, column = self.rows[student], self.subject_index[subject]
+        self.marks[row, column] = mark
+        self.present[row, column] = True
+        return True
+    
+    def group(self, grade=None):
+        """Return the marks and mask of every student, or of the students in one grade"""
+        if grade is None:
+            return self.marks, self.present
+        code = self.grade_index.get(grade)
+        if code is None:
+            return self.marks[:0], self.present[:0]
+        rows = self.grade_order[self.grade_bounds[code]:self.grade_bounds[code + 1]]
+        return self.marks[rows], self.present[rows]
+    
+    def grade_counts(self):
+        """Return a dict of grade -> number of students"""
+        return dict(zip(self.grades, np.diff(self.grade_bounds).tolist()))
+    
+    def subject_averages(self, grade=None):
+        """Return a dict of subject -> average mark, over all students or one grade"""
+        marks, present = self.group(grade)
+        counts = np.count_nonzero(present, axis=0)
+        totals = np.nansum(marks, axis=0)
+        return {subject: totals[column] / counts[column]
+                for column, subject in enumerate(self.subjects) if counts[column]}
+    
+    def subject_stats(self, grade=None, percentiles=(10, 90)):
+        """Return a dict of subject -> count, mean, median, std and percentiles, over all students or one grade"""
+        marks, present = self.group(grade)
+        counts = np.count_nonzero(present, axis=0)
+        with warnings.catch_warnings():
+            # Subjects nobody in the group takes reduce over empty columns
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = np.nanmean(marks, axis=0)
+            stds = np.nanstd(marks, axis=0)
+            quantiles = np.nanpercentile(marks, [50, *percentiles], axis=0) if len(marks) else None
+        stats = {}
+        for column, subject in enumerate(self.subjects):
+            if not counts[column]:
+                continue
+            stats[subject] = {'count': int(counts[column]), 'mean': float(means[column]),
+                              'median': float(quantiles[0, column]), 'std': float(stds[column])}
+            for position, percent in enumerate(percentiles, start=1):
+                stats[subject][f'p{percent}'] = float(quantiles[position, column])
+        return stats
+    
+    def stats_by_grade(self, percentiles=(10, 90)):
+        """Return a dict of grade -> subject statistics for that grade"""
+        return {grade: self.subject_stats(grade, percentiles) for grade in self.grades}
+    
+    def grade_averages(self):
+        """Return a dict of grade -> average over every mark of its students"""
+        averages = {}
+        for grade in self.grades:
+            marks, present = self.group(grade)
+            count = np.count_nonzero(present)
+            if count:
+                averages[grade] = float(np.nansum(marks) / count)
+        return averages
+    
+    def summary(self):
+        """Return grade counts and subject averages in the same form as report_engine.compute_summary"""
+        return {'grade_counts': self.grade_counts(), 'subject_averages': self.subject_averages()}
+    
+    def __len__(self):
+        return len(self.students)
@@ -1,4 +1,6 @@
 class Person:
+    __slots__ = ('name', 'age')
+    
     def __init__(self, name, age):
         self.name = name
         self.age = age
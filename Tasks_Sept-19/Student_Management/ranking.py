@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right, insort
+
+class StudentRanking:
+    def __init__(self, students=()):
+        """Rank students by average marks, best first, with ties kept in the order students were added"""
+        self.entries = []  # (-average, sequence, student) sorted ascending, so best first
+        self.by_grade = {}  # grade -> entries of that grade, best first
+        self.keys = {}  # student -> (-average, sequence) it is filed under
+        self.sequence = 0
+        for student in students:
+            entry = self.make_entry(student)
+            self.entries.append(entry)
+            self.by_grade.setdefault(student.grade, []).append(entry)
+        # One sort for a bulk build instead of an insort per student
+        self.entries.sort(key=self.sort_key)
+        for entries in self.by_grade.values():
+            entries.sort(key=self.sort_key)
+    
+    @staticmethod
+    def sort_key(entry):
+        return entry[0], entry[1]
+    
+    def make_entry(self, student):
+        key = (-student.get_average(), self.sequence)
+        self.sequence += 1
+        self.keys[student] = key
+        return key + (student,)
+    
+    def add(self, student):
+        """Add a student in rank order"""
+        entry = self.make_entry(student)
+        insort(self.entries, entry, key=self.sort_key)
+        insort(self.by_grade.setdefault(student.grade, []), entry, key=self.sort_key)
+    
+    def remove(self, student):
+        """Remove a student, using the average it was ranked with"""
+        key = self.keys.pop(student)
+        for entries in (self.entries, self.by_grade[student.grade]):
+            del entries[bisect_left(entries, key, key=self.sort_key)]
+        if not self.by_grade[student.grade]:
+            del self.by_grade[student.grade]
+    
+    def update(self, student):
+        """Move a student to its new place after its marks changed"""
+        self.remove(student)
+        self.add(student)
+    
+    def top(self, n=1, grade=None):
+        """Return the n students with the highest averages, overall or in one grade"""
+        entries = self.entries if grade is None else self.by_grade.get(grade, [])
+        return [entry[2] for entry in entries[:n]]
+    
+    def toppers(self):
+        """Return a dict of grade -> student with the highest average in that grade"""
+        return {grade: entries[0][2] for grade, entries in self.by_grade.items()}
+    
+    def percentile(self, student, grade=None):
+        """Return the percentage of students, overall or in a grade, with a lower average than this student"""
+        entries = self.entries if grade is None else self.by_grade.get(grade, [])
+        if not entries:
+            return 0.0
+        # Students with a lower average sort after every entry with this average
+        lower = len(entries) - bisect_right(entries, (-student.get_average(), float('inf')), key=self.sort_key)
+        return 100 * lower / len(entries)
+    
+    def at_percentile(self, percent, grade=None):
+        """Return the student at a percentile of average marks, overall or in a grade"""
+        entries = self.entries if grade is None else self.by_grade.get(grade, [])
+        if not entries:
+            return None
+        from_bottom = min(len(entries) - 1, int(percent / 100 * len(entries)))
+        return entries[len(entries) - 1 - from_bottom][2]
+    
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,30 @@
+import common_path
+from common.sharding import run_sharded
+
+def summary_partial(rows):
+    """Compute grade counts and subject totals for one shard of (grade, marks) rows"""
+    grade_counts = {}
+    subject_marks = {}
+    subject_counts = {}
+    for grade, marks in rows:
+        grade_counts[grade] = grade_counts.get(grade, 0) + 1
+        for subject, mark in marks.items():
+            subject_marks[subject] = subject_marks.get(subject, 0) + mark
+            subject_counts[subject] = subject_counts.get(subject, 0) + 1
+    return {'grade_counts': grade_counts, 'subject_marks': subject_marks, 'subject_counts': subject_counts}
+
+def merge_summary(partials):
+    """Merge per-shard summary totals"""
+    merged = {'grade_counts': {}, 'subject_marks': {}, 'subject_counts': {}}
+    for shard_totals in partials:
+        for key, totals in merged.items():
+            for name, value in shard_totals[key].items():
+                totals[name] = totals.get(name, 0) + value
+    merged['subject_averages'] = {subject: total_marks / merged['subject_counts'][subject]
+                                  for subject, total_marks in merged['subject_marks'].items()}
+    return merged
+
+def compute_summary(students, workers=None):
+    """Compute students per grade and average marks per subject, sharded across worker processes"""
+    rows = [(student.grade, student.marks) for student in students]
+    return run_sharded(summary_partial, merge_summary, rows, workers)
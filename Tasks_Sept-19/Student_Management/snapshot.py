@@ -0,0 +1,111 @@
+from array import array
+import common_path
+from common.snapshot_file import StringTable, SnapshotFile, id_order, write_columns
+from student import Student
+from teacher import Teacher
+
+MAGIC = b'SMSNAP01'
+
+def write_snapshot(path, students, teachers):
+    """Write students and teachers to a binary snapshot"""
+    strings = StringTable()
+    columns = {
+        'students.id': array('q'), 'students.name': array('I'), 'students.age': array('q'),
+        'students.grade': array('I'), 'students.marks_start': array('Q', [0]),
+        'marks.subject': array('I'), 'marks.value': array('d'),
+        'teachers.id': array('q'), 'teachers.name': array('I'), 'teachers.subject': array('I'),
+        'teachers.salary': array('d')
+    }
+    for student in students:
+        columns['students.id'].append(student.id)
+        columns['students.name'].append(strings.add(student.name))
+        columns['students.age'].append(-1 if student.age is None else student.age)
+        columns['students.grade'].append(strings.add(student.grade))
+        for subject, mark in student.marks.items():
+            columns['marks.subject'].append(strings.add(subject))
+            columns['marks.value'].append(mark)
+        columns['students.marks_start'].append(len(columns['marks.subject']))
+    columns['students.by_id'] = id_order(columns['students.id'])
+    for teacher in teachers:
+        columns['teachers.id'].append(teacher.id)
+        columns['teachers.name'].append(strings.add(teacher.name))
+        columns['teachers.subject'].append(strings.add(teacher.subject))
+        columns['teachers.salary'].append(teacher.salary)
+    columns['strings.offsets'], columns['strings.data'] = strings.columns()
+    write_columns(path, MAGIC, columns, {'students': len(columns['students.id']), 'teachers': len(columns['teachers.id'])})
+
+def mark_value(value):
+    """Return whole marks as ints, the way they are written in students.json"""
+    return int(value) if value.is_integer() else value
+
+class Snapshot(SnapshotFile):
+    def __init__(self, path):
+        super().__init__(path, MAGIC)
+        self.students = {}  # row -> materialised Student
+
+    def student_count(self):
+        return self.counts['students']
+
+    def teacher_count(self):
+        return self.counts['teachers']
+
+    def student(self, row):
+        """Materialise the student in a row"""
+        if row not in self.students:
+            string = self.string
+            marks_start = self.column('students.marks_start')
+            subjects = self.column('marks.subject')
+            values = self.column('marks.value')
+            age = self.column('students.age')[row]
+            self.students[row] = Student(
+                self.column('students.id')[row],
+                string(self.column('students.name')[row]),
+                None if age == -1 else age,
+                string(self.column('students.grade')[row]),
+                {string(subjects[mark]): mark_value(values[mark])
+                 for mark in range(marks_start[row], marks_start[row + 1])}
+            )
+        return self.students[row]
+
+    def find_student(self, student_id):
+        """Materialise the student with the given id, or return None"""
+        row = self.find_row('students.id', 'students.by_id', student_id)
+        return self.student(row) if row is not None else None
+
+    def teacher(self, row, strings=None):
+        """Materialise the teacher in a row"""
+        string = strings.__getitem__ if strings else self.string
+        return Teacher(
+            self.column('teachers.id')[row],
+            string(self.column('teachers.name')[row]),
+            string(self.column('teachers.subject')[row]),
+            self.column('teachers.salary')[row]
+        )
+
+    def iter_students(self):
+        """Materialise every student in saved order"""
+        strings = self.all_strings()
+        ids = self.column('students.id').tolist()
+        names = self.column('students.name').tolist()
+        ages = self.column('students.age').tolist()
+        grades = self.column('students.grade').tolist()
+        marks_start = self.column('students.marks_start').tolist()
+        subjects = [strings[subject] for subject in self.column('marks.subject').tolist()]
+        values = [mark_value(value) for value in self.column('marks.value').tolist()]
+        for row in range(len(ids)):
+            if row not in self.students:
+                start, end = marks_start[row], marks_start[row + 1]
+                self.students[row] = Student(
+                    ids[row],
+                    strings[names[row]],
+                    None if ages[row] == -1 else ages[row],
+                    strings[grades[row]],
+                    dict(zip(subjects[start:end], values[start:end]))
+                )
+            yield self.students[row]
+
+    def iter_teachers(self):
+        """Materialise every teacher in saved order"""
+        strings = self.all_strings()
+        for row in range(self.teacher_count()):
+            yield self.teacher(row, strings)
@@ -1,23 +1,45 @@
 from person import Person
 
 class Student(Person):
+    __slots__ = ('id', 'grade', '_marks', '_average', '_highest_subject')
+    
     def __init__(self, id, name, age, grade, marks):
         super().__init__(name, age)
         self.id = id
         self.grade = grade
         self.marks = marks
     
+    @property
+    def marks(self):
+        """Subject -> mark. Change single marks with set_mark so cached values stay correct"""
+        return self._marks
+    
+    @marks.setter
+    def marks(self, marks):
+        self._marks = marks
+        self.clear_cache()
+    
+    def set_mark(self, subject, mark):
+        """Set the mark for one subject"""
+        self._marks[subject] = mark
+        self.clear_cache()
+    
+    def clear_cache(self):
+        """Forget the cached average and highest subject, so they are recomputed on next use"""
+        self._average = None
+        self._highest_subject = None
+    
     def get_average(self):
         """Calculate and return average marks"""
-        if not self.marks:
-            return 0
-        return sum(self.marks.values()) / len(self.marks)
+        if self._average is None:
+            self._average = sum(self._marks.values()) / len(self._marks) if self._marks else 0
+        return self._average
     
     def get_highest_subject(self):
         """Return the subject with the highest marks"""
-        if not self.marks:
-            return None
-        return max(self.marks, key=self.marks.get)
+        if self._highest_subject is None and self._marks:
+            self._highest_subject = max(self._marks, key=self._marks.get)
+        return self._highest_subject
     
     def __str__(self):
-        return f"ID: {self.id}, {super().__str__()}, Grade: {self.grade}, Average: {self.get_average():.2f}"
\ No newline at end of file
+        return f"ID: {self.id}, {super().__str__()}, Grade: {self.grade}, Average: {self.get_average():.2f}"
\ No newline at end of file
@@ -1,6 +1,8 @@
 from person import Person
 
 class Teacher(Person):
+    __slots__ = ('id', 'subject', 'salary')
+    
     def __init__(self, id, name, subject, salary):
         super().__init__(name, age=None)  # Age not provided in CSV
         self.id = id
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+@contextlib.contextmanager
+def working_directory(directory):
+    """Run the enclosed block inside a directory, since both systems read and write relative paths"""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+def measure_bytes(factory, count):
+    """Return the average number of bytes allocated per object built by factory"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(index) for index in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+def time_call(function, repeat=3, setup=None):
+    """Return the fastest of repeat runs of function, passing it a fresh setup() result if given"""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            argument = setup() if setup else None
+            start = time.perf_counter()
+            function(argument) if setup else function()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def print_results(results, width=40):
+    """Print each timing in milliseconds, with names padded to width"""
+    for name, seconds in results.items():
+        print(f"{name:<{width}}{seconds * 1000:>10.1f} ms")
+
+def save_results(path, scale, results):
+    """Write benchmark results and the dataset scale they were measured at to a JSON file"""
+    data = {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'results': results
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+    print(f"\nResults saved to {path}")
+
+def compare_results(path, scale, results, tolerance=0.10, noise=0.001, width=40):
+    """Print the change of each result against a baseline file, flagging changes beyond tolerance"""
+    with open(path, 'r') as file:
+        baseline = json.load(file)
+    print(f"\n=== COMPARED WITH {path} ===")
+    if baseline.get('scale') != scale:
+        print(f"Warning: baseline was measured at a different scale {baseline.get('scale')}")
+    for name, seconds in results.items():
+        if name not in baseline['results']:
+            print(f"{name:<{width}}{'new':>10}")
+            continue
+        before = baseline['results'][name]
+        change = (seconds - before) / before if before else 0.0
+        flag = ""
+        # Sub-millisecond differences are timer noise, whatever the percentage
+        if abs(seconds - before) > noise:
+            flag = "  SLOWER" if change > tolerance else "  faster" if change < -tolerance else ""
+        print(f"{name:<{width}}{before * 1000:>10.1f} ->{seconds * 1000:>10.1f} ms {change:>+8.1%}{flag}")
@@ -0,0 +1,149 @@
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+
+def record_size(record):
+    """Estimate the memory held by a record, counting the items of tuples and lists"""
+    size = sys.getsizeof(record)
+    if isinstance(record, (tuple, list)):
+        size += sum(sys.getsizeof(value) for value in record)
+    return size
+
+class ExternalSorter:
+    """Sort more records than fit in memory.
+
+    Records are buffered until the memory budget is used up, then sorted and spilled
+    to a temporary run file. Iterating merges the runs with heapq.merge, so the sorted
+    output is streamed and only one block per run is held in memory. The sort is stable.
+    """
+
+    def __init__(self, key=None, reverse=False, memory_limit=64 * 1024 * 1024, directory=None,
+                 block_size=1000, max_runs=64):
+        self.key = key
+        self.reverse = reverse
+        self.memory_limit = memory_limit  # bytes of buffered records before a run is spilled
+        self.directory = directory  # where run files go, None for the system temp directory
+        self.block_size = block_size  # records pickled together in a run file
+        self.max_runs = max_runs  # most run files merged at once; more are merged in passes
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.runs = []  # paths of sorted run files, oldest first
+        self.count = 0
+
+    def add(self, record):
+        """Add a record, spilling a sorted run once the buffer is over the memory budget"""
+        self.buffer.append(record)
+        self.buffer_bytes += record_size(record)
+        self.count += 1
+        if self.buffer_bytes >= self.memory_limit:
+            self.spill()
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    def spill(self):
+        """Sort the buffered records and write them to a new run file"""
+        if not self.buffer:
+            return
+        self.buffer.sort(key=self.key, reverse=self.reverse)
+        self.runs.append(self.write_run(self.buffer))
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def write_run(self, records):
+        """Write sorted records to a temporary file in blocks and return its path"""
+        descriptor, path = tempfile.mkstemp(prefix='run-', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                block = []
+                for record in records:
+                    block.append(record)
+                    if len(block) >= self.block_size:
+                        pickle.dump(block, file, pickle.HIGHEST_PROTOCOL)
+                        block = []
+                if block:
+                    pickle.dump(block, file, pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def read_run(self, path):
+        """Yield the records of a run file in order"""
+        with open(path, 'rb') as file:
+            while True:
+                try:
+                    block = pickle.load(file)
+                except EOFError:
+                    return
+                yield from block
+
+    def merge(self, paths):
+        return heapq.merge(*(self.read_run(path) for path in paths), key=self.key, reverse=self.reverse)
+
+    def __iter__(self):
+        """Yield every record in sorted order, then delete the run files"""
+        if not self.runs:
+            # Everything fit in memory
+            self.buffer.sort(key=self.key, reverse=self.reverse)
+            yield from self.buffer
+            return
+        self.spill()
+        try:
+            # Merge in passes so no more than max_runs files are open at once
+            while len(self.runs) > self.max_runs:
+                group, self.runs = self.runs[:self.max_runs], self.runs[self.max_runs:]
+                self.runs.insert(0, self.write_run(self.merge(group)))
+                for path in group:
+                    os.remove(path)
+            yield from self.merge(self.runs)
+        finally:
+            self.close()
+
+    def close(self):
+        """Delete any run files left on disk"""
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.runs = []
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def __len__(self):
+        return self.count
+
+def external_sort(records, key=None, reverse=False, memory_limit=64 * 1024 * 1024, directory=None):
+    """Stream records in sorted order, spilling to temporary files beyond memory_limit bytes"""
+    sorter = ExternalSorter(key, reverse, memory_limit, directory)
+    try:
+        sorter.extend(records)
+    except BaseException:
+        sorter.close()
+        raise
+    return iter(sorter)
+
+def ranked(records, score, group=None):
+    """Yield (rank, record) for records already sorted best first, restarting at 1 for each group.
+
+    Records with equal scores share a rank and the next rank skips past them (1, 2, 2, 4).
+    """
+    current_group = object()
+    rank = position = 0
+    previous = None
+    for record in records:
+        record_group = group(record) if group else None
+        if record_group != current_group:
+            current_group = record_group
+            rank = position = 0
+            previous = object()
+        position += 1
+        value = score(record)
+        if value != previous:
+            rank = position
+            previous = value
+        yield rank, record
@@ -0,0 +1,158 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+class Metrics:
+    def __init__(self):
+        self.operations = {}  # operation name -> totals
+        self.lock = threading.Lock()
+        self.local = threading.local()  # per-thread stack of running operations
+        self.profiler = None
+
+    def timed(self, name=None):
+        """Decorator that records calls, time, rows, bytes and peak memory for a function"""
+        def decorator(function):
+            operation = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                stack = self.stack()
+                current = {'rows': 0, 'bytes_read': 0, 'bytes_written': 0}
+                stack.append(current)
+                tracing = tracemalloc.is_tracing()
+                if tracing:
+                    # Nested operations reset the peak, so outer peaks are a lower bound
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    peak = 0
+                    if tracing and tracemalloc.is_tracing():
+                        peak = tracemalloc.get_traced_memory()[1] - baseline
+                    stack.pop()
+                    self.record(operation, elapsed, peak_memory=peak, **current)
+            return wrapper
+        return decorator
+
+    def stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def add(self, rows=0, bytes_read=0, bytes_written=0):
+        """Add rows processed and bytes read or written to the running operation"""
+        stack = self.stack()
+        if stack:
+            stack[-1]['rows'] += rows
+            stack[-1]['bytes_read'] += bytes_read
+            stack[-1]['bytes_written'] += bytes_written
+
+    def record(self, operation, seconds, rows=0, bytes_read=0, bytes_written=0, peak_memory=0):
+        """Add one call of an operation to the totals"""
+        with self.lock:
+            totals = self.operations.setdefault(operation, {
+                'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'rows': 0,
+                'bytes_read': 0, 'bytes_written': 0, 'peak_memory': 0
+            })
+            totals['calls'] += 1
+            totals['total_seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+            totals['rows'] += rows
+            totals['bytes_read'] += bytes_read
+            totals['bytes_written'] += bytes_written
+            totals['peak_memory'] = max(totals['peak_memory'], peak_memory)
+
+    def track_memory(self, enabled=True):
+        """Start or stop measuring peak memory per operation with tracemalloc"""
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def start_profiling(self):
+        """Start collecting a cProfile profile of everything that runs"""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profiling(self, path=None, limit=20):
+        """Stop profiling, optionally dump the raw stats to path, and return the top functions as text"""
+        if self.profiler is None:
+            return ""
+        self.profiler.disable()
+        if path:
+            self.profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        self.profiler = None
+        return output.getvalue()
+
+    def start_from_environment(self):
+        """Turn on profiling if METRICS_PROFILE is set and memory tracking if METRICS_MEMORY is set.
+
+        Returns the path the profile should be dumped to, or None.
+        """
+        profile_path = os.environ.get('METRICS_PROFILE')
+        if profile_path:
+            self.start_profiling()
+        if os.environ.get('METRICS_MEMORY'):
+            self.track_memory()
+        return profile_path
+
+    def snapshot(self):
+        """Return a copy of all totals, with the average time per call"""
+        with self.lock:
+            result = {}
+            for operation, totals in self.operations.items():
+                result[operation] = dict(totals, avg_seconds=totals['total_seconds'] / totals['calls'])
+            return result
+
+    def to_json(self, path=None):
+        """Return all totals as JSON, also writing them to path if given"""
+        data = json.dumps({'created': time.time(), 'operations': self.snapshot()}, indent=2)
+        if path:
+            with open(path, 'w') as file:
+                file.write(data)
+        return data
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+
+    def print_report(self):
+        """Print a table of all operations"""
+        print("\n=== METRICS ===")
+        operations = self.snapshot()
+        if not operations:
+            print("No operations recorded.")
+            return
+        print(f"{'Operation':<28}{'Calls':>7}{'Total s':>10}{'Avg ms':>10}{'Rows':>10}"
+              f"{'Read KB':>10}{'Written KB':>12}{'Peak KB':>10}")
+        for operation, totals in sorted(operations.items(), key=lambda item: -item[1]['total_seconds']):
+            print(f"{operation:<28}{totals['calls']:>7}{totals['total_seconds']:>10.3f}"
+                  f"{totals['avg_seconds'] * 1000:>10.2f}{totals['rows']:>10}"
+                  f"{totals['bytes_read'] / 1024:>10.1f}{totals['bytes_written'] / 1024:>12.1f}"
+                  f"{totals['peak_memory'] / 1024:>10.1f}")
+
+    def show(self):
+        """Print the report and offer to export it as JSON"""
+        self.print_report()
+        path = input("\nExport metrics to JSON file (leave blank to skip): ").strip()
+        if path:
+            try:
+                self.to_json(path)
+                print(f"Metrics exported to {path}")
+            except Exception as e:
+                print(f"Error exporting metrics: {e}")
+
+# Shared registry for the whole program
+metrics = Metrics()
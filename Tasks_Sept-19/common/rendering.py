@@ -0,0 +1,46 @@
+import sys
+
+def write_lines(lines, output=None, chunk_size=10000):
+    """Write lines to output in chunks instead of making one print call per line"""
+    output = output or sys.stdout
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            output.write("\n".join(buffer) + "\n")
+            buffer = []
+    if buffer:
+        output.write("\n".join(buffer) + "\n")
+
+def render(title, items, format_row, page=None, page_size=20, output=None):
+    """Write a title and the formatted rows of one page of items, or of all items if page is None.
+    
+    Only the rows on the page are formatted, so a page of a huge list costs no
+    more than a page of a small one. Returns the number of pages.
+    """
+    output = output or sys.stdout
+    output.write(f"\n=== {title} ===\n")
+    if page is None:
+        write_lines(map(format_row, items), output)
+        return 1
+    
+    pages = max(1, -(-len(items) // page_size))
+    page = min(max(1, page), pages)
+    write_lines(map(format_row, items[(page - 1) * page_size:page * page_size]), output)
+    output.write(f"Page {page} of {pages} ({len(items)} rows)\n")
+    return pages
+
+def browse(show_page):
+    """Show page 1 with show_page(page), then let the user move between pages until they answer blank"""
+    page = 1
+    while True:
+        pages = show_page(page)
+        if pages <= 1:
+            return
+        answer = input(f"Page number (1-{pages}), blank to finish: ").strip()
+        if not answer:
+            return
+        try:
+            page = int(answer)
+        except ValueError:
+            print("Please enter a valid number.")
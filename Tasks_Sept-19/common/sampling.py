@@ -0,0 +1,13 @@
+import random
+from bisect import bisect
+from itertools import accumulate
+
+class ZipfSampler:
+    def __init__(self, n, exponent=1.1, rng=None):
+        """Sample 0..n-1 where item k is drawn with weight 1 / (k + 1) ** exponent"""
+        self.rng = rng or random
+        self.cumulative = list(accumulate(1 / (k + 1) ** exponent for k in range(n)))
+        self.total = self.cumulative[-1]
+
+    def sample(self):
+        return bisect(self.cumulative, self.rng.random() * self.total)
@@ -0,0 +1,113 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from itertools import groupby
+from operator import itemgetter
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    """Split text into case-folded word tokens"""
+    return TOKEN_PATTERN.findall(str(text).casefold())
+
+class SearchIndex:
+    """Inverted index from word tokens to record keys, with prefix matching and ranked results"""
+
+    def __init__(self):
+        self.postings = {}  # token -> set of keys whose text contains it
+        self.documents = {}  # key -> tokens of that record
+        self.terms = None  # sorted tokens for prefix lookups, built on first search
+
+    def add(self, key, *texts):
+        """Index the given texts under a key, replacing anything indexed under it before"""
+        if key in self.documents:
+            self.remove(key)
+        tokens = tuple(dict.fromkeys(token for text in texts for token in tokenize(text)))
+        self.documents[key] = tokens
+        for token in tokens:
+            keys = self.postings.get(token)
+            if keys is None:
+                keys = self.postings[token] = set()
+                if self.terms is not None:
+                    insort(self.terms, token)
+            keys.add(key)
+
+    def remove(self, key):
+        """Remove a key from the index"""
+        for token in self.documents.pop(key, ()):
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                if self.terms is not None:
+                    del self.terms[bisect_left(self.terms, token)]
+
+    def expand(self, prefix):
+        """Return every indexed token starting with prefix"""
+        if self.terms is None:
+            self.terms = sorted(self.postings)
+        matches = []
+        for position in range(bisect_left(self.terms, prefix), len(self.terms)):
+            if not self.terms[position].startswith(prefix):
+                break
+            matches.append(self.terms[position])
+        return matches
+
+    def search(self, query, limit=20):
+        """Return up to limit keys matching every query term, best match first.
+
+        Each term matches tokens it is a prefix of. A key scores the inverse document
+        frequency of its best token for each term, halved when the match is only a prefix.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        expansions = {}
+        for term in terms:
+            expansions[term] = self.expand(term)
+            if not expansions[term]:
+                return []
+
+        total = len(self.documents)
+        def weight(token, term):
+            idf = math.log(1 + total / len(self.postings[token]))
+            return idf if token == term else idf / 2
+
+        if len(terms) == 1:
+            # Take keys a weight at a time, best first, until the results are full
+            results = []
+            seen = set()
+            weighted = sorted(((weight(token, terms[0]), token) for token in expansions[terms[0]]), reverse=True)
+            for _, group in groupby(weighted, key=itemgetter(0)):
+                postings = [self.postings[token] for _, token in group]
+                keys = postings[0] if len(postings) == 1 and not seen else set().union(*postings) - seen
+                results.extend(heapq.nsmallest(limit - len(results), keys))
+                if len(results) >= limit:
+                    break
+                seen |= keys
+            return results
+
+        # Start from the term with the fewest candidates and filter by the others
+        sizes = {term: sum(len(self.postings[token]) for token in tokens) for term, tokens in expansions.items()}
+        terms.sort(key=sizes.get)
+        candidates = set().union(*(self.postings[token] for token in expansions[terms[0]]))
+
+        scores = {}
+        for key in candidates:
+            score = 0.0
+            tokens = self.documents[key]
+            for term in terms:
+                best = 0.0
+                for token in tokens:
+                    if token.startswith(term):
+                        best = max(best, weight(token, term))
+                if not best:
+                    break
+                score += best
+            else:
+                scores[key] = score
+        return heapq.nsmallest(limit, scores, key=lambda key: (-scores[key], key))
+
+    def __len__(self):
+        return len(self.documents)
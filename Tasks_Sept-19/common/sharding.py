@@ -0,0 +1,17 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def run_sharded(partial_function, merge_function, rows, workers=None, min_shard_size=10000):
+    """Split rows into shards, compute partial results in a process pool and merge them"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    num_shards = max(1, min(workers, len(rows) // min_shard_size))
+    if num_shards == 1:
+        return merge_function([partial_function(rows)])
+
+    shard_size = -(-len(rows) // num_shards)
+    shards = [rows[start:start + shard_size] for start in range(0, len(rows), shard_size)]
+    with ProcessPoolExecutor(max_workers=num_shards) as executor:
+        # map keeps shard order, so merged dicts keep first-seen key order
+        partials = list(executor.map(partial_function, shards))
+    return merge_function(partials)
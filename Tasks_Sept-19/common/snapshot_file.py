@@ -0,0 +1,120 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+class StringTable:
+    def __init__(self):
+        self.index = {}  # string -> position in the table
+        self.strings = []
+
+    def add(self, value):
+        """Return the position of a string, adding it if new"""
+        if value not in self.index:
+            self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return self.index[value]
+
+    def columns(self):
+        """Return the offsets and data columns holding every string"""
+        offsets = array('Q', [0])
+        data = bytearray()
+        for value in self.strings:
+            data += value.encode('utf-8')
+            offsets.append(len(data))
+        return offsets, array('B', data)
+
+def id_order(ids):
+    """Return the rows of an id column sorted by id, for binary search with SnapshotFile.find_row"""
+    return array('I', sorted(range(len(ids)), key=ids.__getitem__))
+
+def write_columns(path, magic, columns, counts, **fields):
+    """Write named array columns after the magic bytes and a JSON header, padded to 8-byte boundaries.
+
+    Extra keyword fields are stored in the header and read back as SnapshotFile.header.
+    """
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        layout[name] = [column.typecode, offset, len(column)]
+        offset += -(-len(column) * column.itemsize // 8) * 8
+    header = json.dumps(dict(fields, byteorder=sys.byteorder, counts=counts, columns=layout)).encode('utf-8')
+    header += b' ' * (-(len(magic) + 8 + len(header)) % 8)
+
+    # Write to a temp file first so a crash never leaves a half-written snapshot
+    with open(path + '.tmp', 'wb') as file:
+        file.write(magic + struct.pack('<Q', len(header)) + header)
+        for column in columns.values():
+            data = column.tobytes()
+            file.write(data + b'\0' * (-len(data) % 8))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+
+class SnapshotFile:
+    """A file written by write_columns, memory-mapped so columns are read without copying"""
+
+    def __init__(self, path, magic):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(magic)] != magic:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        header_length = struct.unpack_from('<Q', self.map, len(magic))[0]
+        start = len(magic) + 8
+        self.header = json.loads(self.map[start:start + header_length].decode('utf-8'))
+        if self.header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written on a machine with different byte order")
+        self.data_start = start + header_length
+        self.counts = self.header['counts']
+        self.layout = self.header['columns']
+        self.views = {}  # column name -> memoryview into the map
+
+    def column(self, name):
+        """Return a column as a memoryview over the mapped file, without copying"""
+        if name not in self.views:
+            typecode, offset, count = self.layout[name]
+            start = self.data_start + offset
+            end = start + count * array(typecode).itemsize
+            self.views[name] = memoryview(self.map)[start:end].cast(typecode)
+        return self.views[name]
+
+    def find_row(self, ids_name, order_name, key):
+        """Return the row whose id is key by binary search over an id_order column, or None"""
+        ids = self.column(ids_name)
+        by_id = self.column(order_name)
+        position = bisect_left(by_id, key, key=ids.__getitem__)
+        if position < len(by_id) and ids[by_id[position]] == key:
+            return by_id[position]
+        return None
+
+    def string(self, position):
+        """Return a string from the string table"""
+        offsets = self.column('strings.offsets')
+        data = self.column('strings.data')
+        return bytes(data[offsets[position]:offsets[position + 1]]).decode('utf-8')
+
+    def all_strings(self):
+        """Decode the whole string table at once, for full loads"""
+        offsets = self.column('strings.offsets').tolist()
+        data = bytes(self.column('strings.data'))
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def close(self):
+        """Release all column views and unmap the file"""
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        if not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
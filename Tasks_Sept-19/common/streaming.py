@@ -0,0 +1,90 @@
+import json
+
+WHITESPACE = ' \t\r\n'
+DELIMITERS = WHITESPACE + ',]'
+MAX_ELEMENT_SIZE = 16 * 1024 * 1024  # characters buffered for one element before giving up
+
+def iter_records(path, chunk_size=65536):
+    """Yield records one at a time from a JSON array or JSON Lines file"""
+    with open(path, 'r') as file:
+        yield from iter_file_records(file, chunk_size)
+
+def iter_file_records(file, chunk_size=65536):
+    """Yield records one at a time from an open JSON array or JSON Lines stream, such as stdin"""
+    # Peek at the first character to detect the format
+    first = file.read(1)
+    while first and first in WHITESPACE:
+        first = file.read(1)
+    if first == '[':
+        yield from iter_array(file, chunk_size)
+    elif first:
+        line = first + file.readline()
+        if line.strip():
+            yield json.loads(line)
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_array(file, chunk_size, max_element_size=MAX_ELEMENT_SIZE):
+    """Incrementally decode the elements of a JSON array after its opening bracket"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        # Skip separators between elements
+        while pos < len(buffer) and (buffer[pos] in WHITESPACE or buffer[pos] == ','):
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        if pos < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # A number cut short by the chunk edge also decodes, so only trust an
+                # element once the separator or bracket after it has been read
+                if eof or (end < len(buffer) and buffer[end] in DELIMITERS):
+                    yield record
+                    pos = end
+                    continue
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        if len(buffer) - pos > max_element_size:
+            raise ValueError(f"JSON array element is malformed or longer than {max_element_size} characters")
+        # The next element is incomplete, so read another chunk
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+def iter_batches(items, batch_size):
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def validated_batches(records, validate, errors, batch_size):
+    """Yield batches of (record number, record) pairs that passed validate.
+
+    Each batch is validated in full before it is yielded, so the caller never applies part of a
+    batch and then finds a bad record. Failures are appended to errors as (record number, message).
+    """
+    number = 0
+    for batch in iter_batches(records, batch_size):
+        valid = []
+        for record in batch:
+            number += 1
+            error = validate(record)
+            if error:
+                errors.append((number, error))
+            else:
+                valid.append((number, record))
+        yield valid
@@ -0,0 +1,99 @@
+import atexit
+import contextlib
+import os
+import threading
+
+@contextlib.contextmanager
+def atomic_open(path, newline=None):
+    """Open a temp file for writing that replaces path only once it is complete and on disk"""
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w', newline=newline) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        # Never leave a half-written temp file behind
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+class WriteBehind:
+    def __init__(self, interval=2.0, max_dirty=1000):
+        self.interval = interval  # seconds between background flushes, None flushes on max_dirty only
+        self.max_dirty = max_dirty  # dirty entities that trigger a flush straight away
+        self.writers = {}  # data set name -> (function writing it and raising on failure, whether it takes keys)
+        self.dirty = {}  # data set name -> keys of entities changed since it was last written
+        self.lock = threading.Lock()  # Guards dirty
+        self.flush_lock = threading.Lock()  # One flush at a time
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.closed = False
+
+    def register(self, name, write, pass_keys=False):
+        """Register the function that writes a data set.
+        
+        With pass_keys, write is called with the dirty keys so it can write only
+        those parts, or with None when the whole data set was marked dirty.
+        """
+        self.writers[name] = (write, pass_keys)
+
+    def mark_dirty(self, name, key=None):
+        """Record that an entity of a data set changed, so the data set is written by a later flush"""
+        with self.lock:
+            self.dirty.setdefault(name, set()).add(key)
+            count = sum(len(keys) for keys in self.dirty.values())
+            if self.thread is None and not self.closed:
+                self.thread = threading.Thread(target=self.run, name='write-behind', daemon=True)
+                self.thread.start()
+                # Whatever is still dirty is written when the program exits
+                atexit.register(self.close)
+        if count >= self.max_dirty:
+            self.wakeup.set()
+
+    def pending(self):
+        """Return the number of dirty entities waiting to be written"""
+        with self.lock:
+            return sum(len(keys) for keys in self.dirty.values())
+
+    def run(self):
+        """Flush in the background every interval, or sooner once max_dirty entities are dirty"""
+        while not self.closed:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if not self.closed:
+                self.flush()
+
+    def flush(self, *names):
+        """Write every dirty data set, or only the named ones, now.
+        
+        Returns False if a write failed; its data set stays dirty.
+        """
+        with self.flush_lock:
+            with self.lock:
+                dirty = {name: keys for name, keys in self.dirty.items() if not names or name in names}
+                for name in dirty:
+                    del self.dirty[name]
+            success = True
+            for name, keys in dirty.items():
+                write, pass_keys = self.writers[name]
+                try:
+                    if pass_keys:
+                        write(None if None in keys else keys)
+                    else:
+                        write()
+                except Exception as e:
+                    print(f"Error writing {name}: {e}")
+                    success = False
+                    with self.lock:
+                        self.dirty.setdefault(name, set()).update(keys)
+            return success
+
+    def close(self):
+        """Stop the background thread and write everything still dirty"""
+        self.closed = True
+        self.wakeup.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        return self.flush()